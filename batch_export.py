@@ -0,0 +1,164 @@
+"""
+HH Bill Book - Batch Export
+---------------------------
+Saved bills ko date range ya bill IDs ke hisaab se ek saath export karna
+(mahine ke aakhir mein accountant ke liye).
+
+    - "zip_pdf" / "zip_jpg" : har bill ki alag file, ek ZIP mein. Bills ek
+      thread pool par render hote hain: file likhna aur ZIP mein daalna
+      saath saath chalta hai, magar reportlab / PIL rendering zyada tar GIL
+      pakre rehti hai, is liye yeh CPU cores par parallel nahi.
+    - "pdf"                 : ek combined multi-page PDF (har bill ek page).
+
+Bills storage se stream hote hain aur ek waqt mein sirf chand bills
+"in flight" hote hain, is liye memory history ke size par depend nahi karti.
+"""
+import os
+import shutil
+import zipfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from renderer import RENDERERS, ExportCancelled, draw_pdf_page
+
+
+# "1-99999999" jaisi range poori list banaye to UI ruk jaye
+MAX_BILL_IDS = 5000
+
+FORMATS = {
+    "pdf": "Combined PDF",
+    "zip_pdf": "ZIP of PDFs",
+    "zip_jpg": "ZIP of JPGs",
+}
+
+
+def parse_bill_ids(text, max_id=None):
+    """"1, 4, 10-12" -> [1, 4, 10, 11, 12]
+
+    Ranges stop at max_id (the latest bill number). Raises ValueError for bad
+    input or more than MAX_BILL_IDS IDs.
+    """
+    ids = []
+    for part in str(text).replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            lo, hi = int(lo), int(hi)
+            if max_id is not None:
+                hi = min(hi, max_id)
+            if hi - lo + 1 > MAX_BILL_IDS - len(ids):
+                raise ValueError("too many bill IDs")
+            ids.extend(range(lo, hi + 1))
+        else:
+            ids.append(int(part))
+    if len(ids) > MAX_BILL_IDS:
+        raise ValueError("too many bill IDs")
+    return ids
+
+
+def select_bills(repo, start=None, end=None, bill_ids=None):
+    """Stream the bills to export from the repository."""
+    if bill_ids:
+        for bill_id in bill_ids:
+            bill = repo.get_bill(bill_id)
+            if bill is not None:
+                yield bill
+    else:
+        yield from repo.bills_between(start, end)
+
+
+def _render_one(kind, bill, settings, out_dir, name):
+    """Pool worker: render one bill to out_dir/name."""
+    return RENDERERS[kind](bill, settings, os.path.join(out_dir, name))
+
+
+def export_zip(bills, settings, out_path, kind="pdf", workers=None, progress=None, cancelled=None):
+    """Render bills on a thread pool into a ZIP of per-bill files. Returns the file count."""
+    workers = workers or os.cpu_count() or 2
+    max_inflight = workers * 2
+    tmp_dir = tempfile.mkdtemp(prefix="hh_batch_")
+    tmp_zip = out_path + ".part"
+    names = set()
+    done_count = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool, \
+                zipfile.ZipFile(tmp_zip, "w", zipfile.ZIP_DEFLATED) as zf:
+            pending = set()
+
+            def collect():
+                # kam az kam ek render mukammal hone tak ruko, phir ZIP mein daal kar file hatao
+                nonlocal pending, done_count
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    path = f.result()
+                    zf.write(path, os.path.basename(path))
+                    os.remove(path)
+                    done_count += 1
+                    if progress:
+                        progress(done_count)
+
+            for bill in bills:
+                if cancelled is not None and cancelled():
+                    raise ExportCancelled()
+                name = f"Bill_{bill['id']}.{kind}"
+                n = 2
+                while name in names:
+                    name = f"Bill_{bill['id']}_{n}.{kind}"
+                    n += 1
+                names.add(name)
+                pending.add(pool.submit(_render_one, kind, bill, settings, tmp_dir, name))
+                if len(pending) >= max_inflight:
+                    collect()
+            while pending:
+                if cancelled is not None and cancelled():
+                    for f in pending:
+                        f.cancel()
+                    raise ExportCancelled()
+                collect()
+        os.replace(tmp_zip, out_path)
+        return done_count
+    except BaseException:
+        if os.path.exists(tmp_zip):
+            os.remove(tmp_zip)
+        raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def export_combined_pdf(bills, settings, out_path, progress=None, cancelled=None):
+    """One multi-page PDF, one bill per page. Returns the page count."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+
+    tmp_path = out_path + ".part"
+    c = canvas.Canvas(tmp_path, pagesize=A4)
+    count = 0
+    try:
+        for bill in bills:
+            if cancelled is not None and cancelled():
+                raise ExportCancelled()
+            c.saveState()
+            draw_pdf_page(c, bill, settings)
+            c.restoreState()
+            c.showPage()
+            count += 1
+            if progress:
+                progress(count)
+        if count:
+            c.save()
+            os.replace(tmp_path, out_path)
+        return count
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def export_batch(repo, settings, out_path, fmt="pdf", start=None, end=None, bill_ids=None,
+                 progress=None, cancelled=None, workers=None):
+    bills = select_bills(repo, start, end, bill_ids)
+    if fmt == "pdf":
+        return export_combined_pdf(bills, settings, out_path, progress, cancelled)
+    kind = fmt.split("_", 1)[1]
+    return export_zip(bills, settings, out_path, kind, workers, progress, cancelled)
@@ -0,0 +1,12 @@
+"""
+HH Bill Book - Benchmarks
+-------------------------
+Headless performance checks (Kivy window ke baghair), repo root se chalayein:
+
+    python -m benchmarks.bench_storage --scale 1k,10k --out bench.json
+    python -m benchmarks.bench_storage --scale 10k --baseline bench.json
+    python -m benchmarks.bench_ui --bills 10k --out ui.json     (SDL offscreen window)
+
+Data benchmarks.datagen se banta hai (fixed seed, har run par same data).
+Yeh folder APK mein shamil nahi hota (buildozer.spec: source.exclude_dirs).
+"""
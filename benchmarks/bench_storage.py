@@ -0,0 +1,190 @@
+"""
+Storage, search and report benchmarks at 1k / 10k / 100k / 1M bills.
+
+    python -m benchmarks.bench_storage --scale 1k,10k --backend sqlite --out bench.json
+    python -m benchmarks.bench_storage --scale 10k --baseline bench.json
+
+Har scale ke liye temp folder mein synthetic data likha jata hai, phir yeh
+naape jate hain:
+
+    save_data / load_data      products aur poori bill history (storage API)
+    bills_page.first           Reports / History ka pehla page
+    bill_number.allocate       ek bill number (per call)
+    add_bill                   DataService ke through ek bill + rollups update
+    search.*                   index build aur on_search_text jaisi typing (per keystroke)
+    catalog.find_sku           ~500 barcode lookups (scan mode)
+    rollups.* / report.*       Reports summary, verify (rebuild) aur ek mahine ke bills
+
+--baseline di ho to regressions (DEFAULT_THRESHOLD se zyada slow) par exit code 1.
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from datacache import DataService
+from search import ProductSearchIndex
+from rollups import SalesRollups
+from benchmarks import datagen
+from benchmarks.results import (measure, summarize, write_results, load_results, compare,
+                                format_table, format_comparison, DEFAULT_THRESHOLD)
+
+
+SEARCH_SAMPLES = 50
+ALLOCATIONS = 200
+NEW_BILLS = 100
+
+
+def repeats_for(n):
+    if n <= 10_000:
+        return 5
+    if n <= 100_000:
+        return 3
+    return 1
+
+
+def seed_store(data_dir, backend, n):
+    """Write products + n bills; returns (products, seconds)."""
+    products = datagen.products(datagen.product_count_for(n))
+    storage.init_repository(data_dir, backend)
+    bills = datagen.bills(n, products)
+    if backend == "json":
+        bills = list(bills)  # json snapshot ek hi dafa likha jata hai
+    t0 = time.perf_counter()
+    storage.save_data(os.path.join(data_dir, "products.json"), products)
+    storage.save_data(os.path.join(data_dir, "bills.json"), bills)
+    return products, time.perf_counter() - t0
+
+
+def typing_prefixes(products, samples=SEARCH_SAMPLES, seed=datagen.SEED):
+    """Every prefix a user types on the way to some product names (like on_search_text)."""
+    rng = random.Random(seed)
+    prefixes = []
+    for p in rng.sample(products, min(samples, len(products))):
+        text = p["name"][:14]
+        prefixes.extend(text[:i] for i in range(1, len(text) + 1))
+    return prefixes
+
+
+def bench_scale(label, n, backend, root):
+    data_dir = os.path.join(root, f"{backend}_{label}")
+    shutil.rmtree(data_dir, ignore_errors=True)
+    print(f"[{backend} {label}] seeding {n} bills...", flush=True)
+    products, seed_s = seed_store(data_dir, backend, n)
+    repo = storage.get_repository()
+    repeat = repeats_for(n)
+    results = {"seed.total": summarize([seed_s * 1000])}
+
+    products_path = os.path.join(data_dir, "products.json")
+    bills_path = os.path.join(data_dir, "bills.json")
+
+    # --- load_data / save_data ---
+    results["save_data.products"] = measure(lambda: storage.save_data(products_path, products), repeat)
+    results["load_data.products"] = measure(lambda: storage.load_data(products_path, []), repeat)
+    results["load_data.bills"] = measure(lambda: storage.load_data(bills_path, []), repeat)
+    results["bills_page.first"] = measure(lambda: repo.bills_page(0, 50, newest_first=True), 20)
+
+    # --- bill numbers ---
+    times = []
+    for _ in range(ALLOCATIONS):
+        t0 = time.perf_counter()
+        repo.allocate_bill_number()
+        times.append((time.perf_counter() - t0) * 1000)
+    results["bill_number.allocate"] = summarize(times)
+
+    # --- search (as on_search_text -> DataService.search_products) ---
+    results["search.index_build"] = measure(lambda: ProductSearchIndex(products), repeat)
+    data = DataService(repo)
+    data.product_index()
+    times = []
+    for prefix in typing_prefixes(products):
+        t0 = time.perf_counter()
+        data.search_products(prefix, 5)
+        times.append((time.perf_counter() - t0) * 1000)
+    results["search.keystroke"] = summarize(times)
+
+    # --- barcode scan / add_item lookups (ProductCatalog) ---
+    catalog = data.catalog()
+    codes = [p["sku"] for p in products[::max(1, len(products) // 500)]]
+    results["catalog.find_sku"] = measure(lambda: [catalog.find_sku(c) for c in codes], repeat)
+
+    # --- reports ---
+    rebuilt = []
+    results["rollups.rebuild"] = measure(lambda: rebuilt.append(SalesRollups.rebuild(repo.iter_bills())),
+                                         repeat)
+    repo.replace_rollups(rebuilt[-1])
+
+    def summary():
+        rollups = DataService(repo).rollups()
+        last = repo.bills_page(0, 1, newest_first=True)[0]["date"]
+        rollups.get("day", last)
+        rollups.get("month", last[:7])
+        rollups.top("product", 10)
+        rollups.top("customer", 10)
+    results["rollups.summary"] = measure(summary, repeat)
+
+    last = repo.bills_page(0, 1, newest_first=True)[0]["date"]
+    month = last[:7]
+    results["report.month_bills"] = measure(
+        lambda: sum(1 for _ in repo.bills_between(month + "-01", month + "-31")), repeat)
+
+    # --- saving new bills (DataService: storage + rollups) ---
+    new_bills = list(datagen.bills(NEW_BILLS, products, seed=datagen.SEED + 7))
+    times = []
+    for bill in new_bills:
+        bill = dict(bill, id=repo.allocate_bill_number())
+        t0 = time.perf_counter()
+        data.add_bill(bill)
+        times.append((time.perf_counter() - t0) * 1000)
+    results["add_bill"] = summarize(times)
+
+    repo.close()
+    storage._active = None
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HH Bill Book storage / search benchmarks")
+    parser.add_argument("--scale", default="1k,10k",
+                        help="comma separated: 1k,10k,100k,1m or a bill count")
+    parser.add_argument("--backend", default="sqlite", choices=sorted(storage.BACKENDS) + ["all"])
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against an earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--workdir", help="keep generated data here instead of a temp folder")
+    args = parser.parse_args(argv)
+
+    backends = sorted(storage.BACKENDS) if args.backend == "all" else [args.backend]
+    root = args.workdir or tempfile.mkdtemp(prefix="hh_bench_")
+    results = {}
+    try:
+        for backend in backends:
+            for label in args.scale.split(","):
+                label = label.strip().lower()
+                n = datagen.parse_scale(label)
+                key = label if len(backends) == 1 else f"{backend}:{label}"
+                results[key] = bench_scale(label, n, backend, root)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print(format_table(results))
+    if args.out:
+        write_results(args.out, results, suite="storage", backends=backends)
+        print("written", args.out)
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.threshold)
+        print(format_comparison(rows))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Headless UI latency / frame-time benchmark for BillingApp with large data.
+
+    python -m benchmarks.bench_ui --bills 10k --out ui.json
+    python -m benchmarks.bench_ui --bills 10k --baseline ui.json
+
+Temp folder mein synthetic app_data (benchmarks.datagen) bana kar asal
+BillingApp chalata hai (SDL offscreen window, maxfps=0) aur script ke
+zariye yeh karta hai:
+
+    nav.<screen>            screens ke darmiyan aana jana (pehli dafa lazy build alag)
+    refresh.<screen>        Products / Reports / Customers refresh
+    billing.keystroke       prod_search mein ek ek harf type karna
+    billing.select / add_item / save_bill
+
+Har action ke liye:
+
+    <action>               action shuru hone se agla frame mukammal hone tak (ms)
+    <action>.call          sirf action ka apna call
+    <action>.worst_frame   settle window (debounce search waghera) ka sab se lamba frame
+
+Data purani install jaisa "steady state" mein hota hai: rollups bane hue aur
+purane mahine archive mein. --cold par yeh kaam app khud pehli dafa karti hai
+(background rollups rebuild + auto archive), jo session ke frames par asar
+dalta hai.
+
+--baseline di ho to regressions par exit code 1 (bench_storage jaisa).
+"""
+import os
+import sys
+import time
+import datetime
+import shutil
+import argparse
+import tempfile
+
+# Kivy import hone se pehle: koi window / console args nahi
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+if sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+    os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import storage
+from rollups import SalesRollups
+from bill_archive import add_months
+from benchmarks import datagen
+from benchmarks.bench_storage import seed_store
+from benchmarks.results import (summarize, write_results, load_results, compare,
+                                format_table, format_comparison, DEFAULT_THRESHOLD)
+
+
+# har action ke baad itni der frames record hon (search debounce 0.15 s se zyada)
+SETTLE = 0.3
+NAV_ROUNDS = 3
+REFRESH_ROUNDS = 3
+BILLS_TO_SAVE = 3
+ITEMS_PER_BILL = 4
+SCREENS = ("products", "billing", "reports", "customers", "settings", "home")
+
+
+class FrameRecorder:
+    """Drives a scripted session from Clock ticks and records per-action timings."""
+
+    def __init__(self, app, script, settle=SETTLE):
+        self.app = app
+        self.script = script
+        self.settle = settle
+        self.samples = {}       # name -> [ms]
+        self.last_tick = None
+        self.action = None      # (name, t0) of the action being settled
+        self.first_pending = False
+        self.frames = []
+        self.wait_until = 0.0
+        self.error = None
+
+    def add(self, name, ms):
+        self.samples.setdefault(name, []).append(ms)
+
+    def tick(self, dt):
+        now = time.perf_counter()
+        if self.last_tick is not None and self.action is not None:
+            self.frames.append((now - self.last_tick) * 1000)
+        self.last_tick = now
+
+        if self.action is not None and self.first_pending:
+            # action wali iteration ka layout + draw ho chuka
+            self.add(self.action[0], (now - self.action[1]) * 1000)
+            self.first_pending = False
+        if now < self.wait_until:
+            return
+        if self.action is not None:
+            self.add(self.action[0] + ".worst_frame", max(self.frames) if self.frames else 0.0)
+            self.action = None
+            self.frames = []
+
+        try:
+            step = next(self.script)
+        except StopIteration:
+            self.app.stop()
+            return False
+        except Exception as e:
+            self.error = e
+            self.app.stop()
+            return False
+
+        kind, name, func = step
+        t0 = time.perf_counter()
+        func()
+        if kind == "act":
+            self.add(name + ".call", (time.perf_counter() - t0) * 1000)
+            self.action = (name, t0)
+            self.first_pending = True
+            self.wait_until = time.perf_counter() + self.settle
+            self.last_tick = time.perf_counter()
+        else:
+            self.wait_until = 0.0
+
+    def results(self):
+        return {name: summarize(times) for name, times in sorted(self.samples.items())}
+
+
+def close_popups():
+    from kivy.core.window import Window
+    from kivy.uix.modalview import ModalView
+
+    for widget in list(Window.children):
+        if isinstance(widget, ModalView):
+            widget.dismiss(animation=False)
+
+
+def session(app, products):
+    """Generator of ("act", name, func) timed actions and ("do", name, func) setup steps."""
+    sm = app.root
+    first_visit = set()
+
+    def go(name):
+        return lambda: setattr(sm, "current", name)
+
+    # --- navigation (pehli visit par screen lazy banti hai) ---
+    for _ in range(NAV_ROUNDS):
+        for name in SCREENS:
+            label = f"nav.{name}" if name in first_visit else f"nav.{name}.first"
+            first_visit.add(name)
+            yield "act", label, go(name)
+
+    # --- heavy refreshes ---
+    for name in ("products", "reports", "customers"):
+        yield "do", "", go(name)
+        screen = sm.get_screen(name)
+        for _ in range(REFRESH_ROUNDS):
+            yield "act", f"refresh.{name}", screen.refresh
+
+    # --- billing: type, pick suggestion, add, save ---
+    yield "do", "", go("billing")
+    billing = sm.get_screen("billing")
+    picks = iter(products[::max(1, len(products) // (BILLS_TO_SAVE * ITEMS_PER_BILL))])
+    for n in range(BILLS_TO_SAVE):
+        for _ in range(ITEMS_PER_BILL):
+            product = next(picks)
+            text = product["name"][:10]
+            for i in range(1, len(text) + 1):
+                yield "act", "billing.keystroke", lambda t=text[:i]: setattr(billing.prod_search, "text", t)
+
+            def select(p=product):
+                btn = billing.suggestion_pool[0]
+                billing.select_product(btn.product if btn.product is not None else p)
+            yield "act", "billing.select", select
+            yield "act", "billing.add_item", billing.add_item
+
+        def fill(n=n):
+            billing.cname.text = f"Bench Customer {n}"
+            billing.cphone.text = f"0300{n:07d}"
+        yield "do", "", fill
+        yield "act", "billing.save_bill", billing.save_bill
+        yield "do", "", close_popups
+
+    yield "do", "", go("home")
+
+
+def steady_state(repo, keep_months=2):
+    """Build rollups and archive old months, as a long-running install would have."""
+    repo.replace_rollups(SalesRollups.rebuild(repo.iter_bills()))
+    repo.archive_bills(add_months(str(datetime.date.today())[:7], -(keep_months - 1)))
+
+
+def run(bill_count, product_count=None, backend="sqlite", workdir=None, settle=SETTLE, cold=False):
+    """Seed data, run the scripted session inside BillingApp; returns result dict."""
+    root = workdir or tempfile.mkdtemp(prefix="hh_bench_ui_")
+    data_dir = os.path.join(root, "app_data")
+    shutil.rmtree(data_dir, ignore_errors=True)
+    print(f"[ui] seeding {bill_count} bills...", flush=True)
+    products, _ = seed_store(data_dir, backend, bill_count)
+    if product_count and product_count != len(products):
+        products = datagen.products(product_count)
+        storage.save_data(os.path.join(data_dir, "products.json"), products)
+    if not cold:
+        steady_state(storage.get_repository())
+    storage.get_repository().close()
+    storage._active = None
+
+    cwd = os.getcwd()
+    os.chdir(root)  # main.py app_data ko relative path se kholta hai
+    try:
+        from kivy.config import Config
+        Config.set("graphics", "maxfps", "0")  # 60 fps cap ke baghair asal frame cost
+        from kivy.clock import Clock
+        import main
+
+        class BenchApp(main.BillingApp):
+            def on_start(self):
+                super().on_start()
+                self.recorder = FrameRecorder(self, session(self, products), settle)
+                self.recorder.add("startup.first_tick", (time.perf_counter() - main.STARTUP_T0) * 1000)
+                Clock.schedule_interval(self.recorder.tick, 0)
+
+        app = BenchApp()
+        app.run()
+        if app.recorder.error is not None:
+            raise app.recorder.error
+        return app.recorder.results()
+    finally:
+        os.chdir(cwd)
+        if not workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HH Bill Book headless UI benchmark")
+    parser.add_argument("--bills", default="10k", help="1k,10k,100k,1m or a bill count")
+    parser.add_argument("--products", type=int, help="catalogue size (default scales with bills)")
+    parser.add_argument("--backend", default="sqlite", choices=sorted(storage.BACKENDS))
+    parser.add_argument("--settle", type=float, default=SETTLE, help="seconds recorded after each action")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against an earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--workdir", help="keep generated data here instead of a temp folder")
+    parser.add_argument("--cold", action="store_true",
+                        help="no prebuilt rollups / archive (first run after an upgrade)")
+    args = parser.parse_args(argv)
+
+    label = args.bills.strip().lower()
+    results = {label: run(datagen.parse_scale(label), args.products, args.backend, args.workdir,
+                          args.settle, args.cold)}
+
+    print(format_table(results))
+    if args.out:
+        write_results(args.out, results, suite="ui", backend=args.backend, settle=args.settle,
+                      cold=args.cold)
+        print("written", args.out)
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.threshold)
+        print(format_comparison(rows))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Deterministic synthetic data: products, bills and bill items.
+
+Same seed + same scale = byte-for-byte same data, taake runs aapas mein
+compare ho sakein. Bills generator se aate hain, is liye 1M bills bhi
+memory mein ek saath nahi hote (sqlite backend par).
+"""
+import random
+import datetime
+
+
+SCALES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+SEED = 919
+
+WORDS = (
+    "tea", "sugar", "rice", "flour", "oil", "ghee", "salt", "milk", "soap", "biscuit",
+    "lentil", "chana", "masala", "chilli", "turmeric", "coffee", "juice", "butter",
+    "bread", "egg", "shampoo", "detergent", "candle", "matches", "noodles", "ketchup",
+)
+SIZES = ("small", "medium", "large", "250g", "500g", "1kg", "2kg", "5kg", "1l", "pack")
+BRANDS = ("Tapal", "Lipton", "Nestle", "Shan", "National", "Dalda", "Sufi", "Habib",
+          "Knorr", "Olpers", "Lux", "Surf", "Peek", "Mitchells", "Young's", "K&N")
+FIRST = ("Ali", "Ahmed", "Sara", "Ayesha", "Bilal", "Hina", "Usman", "Fatima", "Hamza",
+         "Zainab", "Omar", "Maryam", "Imran", "Nadia", "Kashif", "Rabia")
+LAST = ("Khan", "Butt", "Sheikh", "Malik", "Qureshi", "Chaudhry", "Raza", "Siddiqui")
+
+START_DATE = datetime.date(2024, 1, 1)
+
+
+def parse_scale(text):
+    text = str(text).strip().lower()
+    if text in SCALES:
+        return SCALES[text]
+    return int(text)
+
+
+def products(n, seed=SEED):
+    """n products with unique names and barcodes: [{"id", "name", "price", "sku"}]"""
+    rng = random.Random(seed)
+    out = []
+    for i in range(1, n + 1):
+        name = f"{rng.choice(BRANDS)} {rng.choice(WORDS)} {rng.choice(SIZES)} {i}"
+        out.append({"id": i, "name": name, "price": round(rng.uniform(10, 2500), 2),
+                    "sku": f"89{i:011d}"})
+    return out
+
+
+def customers(n, seed=SEED):
+    """n (name, phone) pairs; bills pick from these so customers repeat."""
+    rng = random.Random(seed + 1)
+    return [(f"{rng.choice(FIRST)} {rng.choice(LAST)}", f"03{rng.randint(0, 99):02d}{rng.randint(0, 9999999):07d}")
+            for _ in range(n)]
+
+
+def bills(n, product_list, seed=SEED, per_day=None, max_items=8):
+    """Yield n bills with ids 1..n, spread over consecutive days."""
+    rng = random.Random(seed + 2)
+    people = customers(max(10, n // 20), seed)
+    per_day = per_day or max(1, n // 730)  # ~2 saal ki history
+    for i in range(1, n + 1):
+        items = []
+        for _ in range(rng.randint(1, max_items)):
+            p = product_list[rng.randrange(len(product_list))]
+            qty = rng.randint(1, 5)
+            items.append({"product": p["name"], "qty": qty, "price": p["price"],
+                          "total": round(qty * p["price"], 2)})
+        name, phone = people[rng.randrange(len(people))]
+        yield {
+            "id": i,
+            "date": str(START_DATE + datetime.timedelta(days=(i - 1) // per_day)),
+            "customer_name": name,
+            "customer_phone": phone,
+            "items": items,
+            "total": round(sum(it["total"] for it in items), 2),
+        }
+
+
+def product_count_for(bill_count):
+    """Catalogue size used alongside a given bill count."""
+    return max(100, min(bill_count // 10, 20_000))
@@ -0,0 +1,100 @@
+"""
+Timing helpers, JSON result files and baseline comparison.
+
+Result file:
+
+    {"meta": {...}, "results": {"10k": {"load_data.bills": {"median_ms": .., "min_ms": .., "runs": ..}}}}
+"""
+import json
+import time
+import platform
+import statistics
+
+
+# baseline se itna (ratio) zyada slow ho to regression
+DEFAULT_THRESHOLD = 1.25
+
+# itne ms se chhoti timings ka shor (noise) ignore
+NOISE_FLOOR_MS = 0.5
+
+
+def measure(func, repeat=5, setup=None):
+    """Run func `repeat` times; returns timing stats in ms."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - t0) * 1000)
+    return summarize(times)
+
+
+def summarize(times_ms):
+    times_ms = sorted(times_ms)
+    return {
+        "median_ms": round(statistics.median(times_ms), 4),
+        "min_ms": round(times_ms[0], 4),
+        "max_ms": round(times_ms[-1], 4),
+        "p95_ms": round(times_ms[min(len(times_ms) - 1, int(len(times_ms) * 0.95))], 4),
+        "runs": len(times_ms),
+    }
+
+
+def meta(**extra):
+    data = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+    data.update(extra)
+    return data
+
+
+def write_results(file_path, results, **extra):
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta(**extra), "results": results}, f, indent=4)
+    return file_path
+
+
+def load_results(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Rows (scale, name, base ms, now ms, ratio, regressed) for metrics in both runs."""
+    rows = []
+    for scale, metrics in current.items():
+        for name, stats in metrics.items():
+            base = baseline.get(scale, {}).get(name)
+            if base is None:
+                continue
+            now_ms, base_ms = stats["median_ms"], base["median_ms"]
+            ratio = now_ms / base_ms if base_ms > 0 else 1.0
+            regressed = ratio > threshold and now_ms - base_ms > NOISE_FLOOR_MS
+            rows.append((scale, name, base_ms, now_ms, ratio, regressed))
+    return rows
+
+
+def _scale_width(scales):
+    return max([len("scale")] + [len(s) for s in scales]) + 2
+
+
+def format_table(results):
+    w = _scale_width(results)
+    lines = [f"{'scale':<{w}}{'benchmark':<34}{'median ms':>12}{'min ms':>12}{'runs':>6}"]
+    for scale, metrics in results.items():
+        for name, s in metrics.items():
+            lines.append(f"{scale:<{w}}{name[:33]:<34}{s['median_ms']:>12.3f}{s['min_ms']:>12.3f}{s['runs']:>6}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    w = _scale_width(row[0] for row in rows)
+    lines = [f"{'scale':<{w}}{'benchmark':<34}{'base ms':>11}{'now ms':>11}{'ratio':>8}"]
+    for scale, name, base_ms, now_ms, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        lines.append(f"{scale:<{w}}{name[:33]:<34}{base_ms:>11.3f}{now_ms:>11.3f}{ratio:>8.2f}{flag}")
+    return "\n".join(lines)
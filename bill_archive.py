@@ -0,0 +1,306 @@
+"""
+HH Bill Book - Monthly Bill Archive
+-----------------------------------
+Purane mahino ke bills compressed monthly shards mein, taake "hot" store
+(bills.json / billbook.db) mein sirf haal ke bills rahein aur roz ka kaam
+(save, paging, search) history ke size par depend na kare. Clear History
+ki tarah kuch delete nahi hota.
+
+    app_data/archive/manifest.json            {"shards": {"2024-01": {...}}}
+    app_data/archive/bills_2024-01.40.json.xz  us mahine ke (40) bills (JSON list)
+
+lzma na ho (kuch Android builds) to zlib (".json.z"); parhte waqt extension
+se codec chuna jata hai. Manifest har shard ka count aur min / max bill ID
+rakhta hai, is liye count, paging aur get_bill sirf zaroori shard kholte
+hain. Khule shards ek chhote LRU (SHARD_CACHE) mein rehte hain.
+
+Archive do qadam mein hota hai: write_month() naye naam se shard file likhta
+hai (purani file aur manifest jaise the waise), publish() manifest badalta
+hai. Storage publish() aur hot store se bills hatana apne lock mein ek saath
+karta hai, taake count / paging kisi bill ko do dafa na ginein. Beech mein
+crash ho to dobara archive karne par duplicate bills shard mein nahi jate.
+
+Manifest kabhi jagah par nahi badalta (har publish naya dict), is liye
+readers (count, months, paging) lock ke baghair ek snapshot parhte hain.
+"""
+import os
+import json
+import zlib
+import threading
+from collections import OrderedDict
+
+try:
+    import lzma
+except ImportError:  # kuch Android / embedded Python builds
+    lzma = None
+
+
+# itne decompressed shards memory mein
+SHARD_CACHE = 3
+MANIFEST = "manifest.json"
+UNDATED = "undated"
+
+CODECS = {
+    ".xz": (lambda data: lzma.compress(data, preset=6), lambda data: lzma.decompress(data)),
+    ".z": (lambda data: zlib.compress(data, 9), zlib.decompress),
+}
+
+
+def default_ext():
+    return ".json.xz" if lzma is not None else ".json.z"
+
+
+def month_of(bill):
+    """"YYYY-MM" shard key of a bill (UNDATED if the date is missing / odd)."""
+    date = str(bill.get("date", ""))
+    month = date[:7]
+    if len(month) == 7 and month[4] == "-" and month.replace("-", "").isdigit():
+        return month
+    return UNDATED
+
+
+def add_months(month, delta):
+    """"2026-10", -1 -> "2026-09"."""
+    year, mon = int(month[:4]), int(month[5:7])
+    index = year * 12 + (mon - 1) + delta
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _bill_id(bill):
+    return int(bill.get("id", 0) or 0)
+
+
+class BillArchive:
+    def __init__(self, archive_dir, cache_size=SHARD_CACHE):
+        self.archive_dir = archive_dir
+        self.cache_size = cache_size
+        self.lock = threading.RLock()
+        self._shards = OrderedDict()  # month -> bills (LRU)
+        self.manifest = self._read_manifest()
+
+    # --------------------------
+    # Manifest
+    # --------------------------
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.archive_dir, MANIFEST), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"shards": {}}
+
+    def _snapshot(self):
+        # publish() / clear() poora manifest badalte hain, is dict ko nahi
+        return self.manifest["shards"]
+
+    @staticmethod
+    def _months(shards, newest_first=False):
+        # UNDATED sab se purana samjha jata hai
+        months = sorted(shards, key=lambda m: "" if m == UNDATED else m)
+        return months[::-1] if newest_first else months
+
+    def months(self, newest_first=False):
+        return self._months(self._snapshot(), newest_first)
+
+    def info(self, month):
+        return self._snapshot().get(month)
+
+    def count(self):
+        return sum(s["count"] for s in self._snapshot().values())
+
+    def size_bytes(self):
+        return sum(s.get("bytes", 0) for s in self._snapshot().values())
+
+    def max_id(self):
+        return max([s["max_id"] for s in self._snapshot().values()] + [0])
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.archive_dir, MANIFEST)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    # --------------------------
+    # Shards
+    # --------------------------
+    def load_shard(self, month, info=None):
+        """Bills of one archived month (decompressed on demand, LRU cached)."""
+        with self.lock:
+            if info is None:
+                info = self.info(month)
+            if info is None:
+                return []
+            cached = self._shards.get(month)
+            if cached is not None and cached[0] == info["file"]:
+                self._shards.move_to_end(month)
+                return cached[1]
+            path = os.path.join(self.archive_dir, info["file"])
+            try:
+                with open(path, "rb") as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                # purana snapshot: publish() naya shard laga kar yeh file hata chuka
+                current = self.info(month)
+                if current is None or current["file"] == info["file"]:
+                    raise
+                return self.load_shard(month, current)
+            decompress = CODECS[os.path.splitext(path)[1]][1]
+            bills = json.loads(decompress(raw).decode("utf-8"))
+            self._cache(month, info["file"], bills)
+            return bills
+
+    def _cache(self, month, file, bills):
+        self._shards[month] = (file, bills)
+        self._shards.move_to_end(month)
+        while len(self._shards) > self.cache_size:
+            self._shards.popitem(last=False)
+
+    def write_month(self, month, bills):
+        """Write a month's shard with `bills` appended, under a new file name.
+
+        Nothing is visible until publish(); returns the staged shard, or None
+        if all bills were already archived.
+        """
+        with self.lock:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            existing = list(self.load_shard(month))
+            seen = {json.dumps(b, sort_keys=True) for b in existing}
+            added = 0
+            for b in bills:
+                key = json.dumps(b, sort_keys=True)
+                if key not in seen:
+                    seen.add(key)
+                    existing.append(b)
+                    added += 1
+            if not added:
+                return None
+
+            ext = default_ext()
+            # naya naam: publish() tak readers purani file parhte rahein
+            name = f"bills_{month}.{len(existing)}{ext}"
+            path = os.path.join(self.archive_dir, name)
+            data = CODECS[os.path.splitext(ext)[1]][0](json.dumps(existing).encode("utf-8"))
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+
+            ids = [_bill_id(b) for b in existing]
+            info = {
+                "file": name,
+                "count": len(existing),
+                "min_id": min(ids),
+                "max_id": max(ids),
+                "bytes": len(data),
+            }
+            return month, info, existing
+
+    def publish(self, staged):
+        """Make write_month() results visible (one manifest write). Returns bills added."""
+        staged = [s for s in staged if s is not None]
+        if not staged:
+            return 0
+        with self.lock:
+            shards = dict(self._snapshot())
+            old = []
+            added = 0
+            for month, info, bills in staged:
+                prev = shards.get(month)
+                if prev is not None and prev["file"] != info["file"]:
+                    old.append(prev["file"])
+                added += info["count"] - (prev["count"] if prev else 0)
+                shards[month] = info
+            manifest = {"shards": shards}
+            self._write_manifest(manifest)
+            self.manifest = manifest
+            for month, info, bills in staged:
+                self._cache(month, info["file"], bills)
+            for file in old:
+                _remove(os.path.join(self.archive_dir, file))
+            return added
+
+    def clear(self):
+        with self.lock:
+            for info in self._snapshot().values():
+                _remove(os.path.join(self.archive_dir, info["file"]))
+            self.manifest = {"shards": {}}
+            self._shards.clear()
+            if os.path.isdir(self.archive_dir):
+                self._write_manifest(self.manifest)
+
+    # --------------------------
+    # Queries
+    # --------------------------
+    def iter_bills(self):
+        shards = self._snapshot()
+        for month in self._months(shards):
+            yield from self.load_shard(month, shards[month])
+
+    def get_bill(self, bill_id):
+        shards = self._snapshot()
+        for month in self._months(shards, newest_first=True):
+            info = shards[month]
+            if info["min_id"] <= bill_id <= info["max_id"]:
+                for b in reversed(self.load_shard(month, info)):
+                    if b.get("id") == bill_id:
+                        return b
+        return None
+
+    def bills_between(self, start=None, end=None, after_id=None):
+        shards = self._snapshot()
+        for month in self._months(shards):
+            info = shards[month]
+            if month != UNDATED and ((start and month < start[:7]) or (end and month > end[:7])):
+                continue
+            if after_id is not None and info["max_id"] <= after_id:
+                continue
+            for b in self.load_shard(month, info):
+                date = b.get("date", "")
+                if (start is None or date >= start) and (end is None or date <= end) \
+                        and (after_id is None or _bill_id(b) > after_id):
+                    yield b
+
+    def page(self, offset, limit, newest_first=False):
+        """Archived bills [offset, offset + limit) in history order; only opens shards it needs."""
+        result = []
+        shards = self._snapshot()
+        for month in self._months(shards, newest_first):
+            if len(result) >= limit:
+                break
+            count = shards[month]["count"]
+            if offset >= count:
+                offset -= count
+                continue
+            bills = self.load_shard(month, shards[month])
+            if newest_first:
+                end = count - offset
+                chunk = bills[max(end - (limit - len(result)), 0):end][::-1]
+            else:
+                chunk = bills[offset:offset + limit - len(result)]
+            result.extend(chunk)
+            offset = 0
+        return result
+
+    def merge_page(self, offset, limit, newest_first, hot_count, hot_page):
+        """Page over archive + hot store (archive is older); hot_page(offset, limit, newest_first)."""
+        if newest_first:
+            page = hot_page(offset, limit, True) if offset < hot_count else []
+            if len(page) < limit:
+                page += self.page(max(offset - hot_count, 0), limit - len(page), True)
+            return page
+        archived = self.count()
+        page = self.page(offset, limit, False) if offset < archived else []
+        if len(page) < limit:
+            page += hot_page(max(offset - archived, 0), limit - len(page), False)
+        return page
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,85 @@
+"""
+HH Bill Book - Product Catalog
+------------------------------
+Products ka in-memory hash index: id, normalized name aur (optional) SKU se
+O(1) lookup / insert. BillingScreen ka add_item, price autofill aur (barcode)
+SKU lookup isi se chalte hain, poori list scan kiye baghair.
+
+Ek hi naam (ya SKU) ke do products hon to pehle wala (kam id) milta hai,
+bilkul purani linear search ki tarah.
+"""
+from storage import name_key
+
+
+def sku_key(sku):
+    """Normalized SKU / barcode ("" if none)"""
+    return str(sku or "").strip().upper()
+
+
+class ProductCatalog:
+    def __init__(self, products=()):
+        self.by_id = {}       # id -> product
+        self.by_name = {}     # name key -> [ids], pehla id asal match
+        self.by_sku = {}      # sku key -> [ids]
+        for p in products:
+            self.add(p)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, product_id):
+        return product_id in self.by_id
+
+    @staticmethod
+    def _link(index, key, pid):
+        if not key:
+            return
+        ids = index.get(key)
+        if ids is None:
+            index[key] = [pid]
+        elif pid not in ids:
+            ids.append(pid)
+            ids.sort()
+
+    @staticmethod
+    def _unlink(index, key, pid):
+        ids = index.get(key)
+        if ids is not None and pid in ids:
+            ids.remove(pid)
+            if not ids:
+                del index[key]
+
+    # --------------------------
+    # Updates
+    # --------------------------
+    def add(self, product):
+        pid = product["id"]
+        if pid in self.by_id:
+            self.remove(pid)
+        self.by_id[pid] = product
+        self._link(self.by_name, name_key(product["name"]), pid)
+        self._link(self.by_sku, sku_key(product.get("sku")), pid)
+
+    def update(self, product):
+        self.add(product)
+
+    def remove(self, product_id):
+        product = self.by_id.pop(product_id, None)
+        if product is not None:
+            self._unlink(self.by_name, name_key(product["name"]), product_id)
+            self._unlink(self.by_sku, sku_key(product.get("sku")), product_id)
+        return product
+
+    # --------------------------
+    # Lookups
+    # --------------------------
+    def get(self, product_id):
+        return self.by_id.get(product_id)
+
+    def find(self, name):
+        ids = self.by_name.get(name_key(name))
+        return self.by_id[ids[0]] if ids else None
+
+    def find_sku(self, sku):
+        ids = self.by_sku.get(sku_key(sku))
+        return self.by_id[ids[0]] if ids else None
@@ -0,0 +1,177 @@
+"""
+HH Bill Book - Customer Directory
+---------------------------------
+Customers pehle sirf bills ke andar the; purane customer ko dhoondne ke liye
+har bill scan karna parta tha. Ab har customer ka ek record hai jo bill save
+hone par incrementally update hota hai:
+
+    {"key", "name", "phone", "spend", "bills", "first_visit", "last_visit"}
+
+    - key          : phone ke digits (rollups.phone_key); phone na ho to
+                     "name:" + normalized naam
+    - phone index  : key -> record (exact), aur sorted phone keys (bisect se
+                     prefix autocomplete)
+    - name index   : sorted (word, key) list, kisi bhi lafz ke prefix se
+                     (search.py ki tarah)
+
+Naam ya phone ke baghair bills ek khali key ("") wale record mein gintay
+hain, taake bill_total() bill history ke barabar rahe; yeh record kisi
+index mein nahi aata. rebuild() raw bills se directory dobara banata hai.
+"""
+from bisect import bisect_left, insort
+from heapq import nlargest
+
+from rollups import phone_key
+from search import normalize
+
+
+FIELDS = ("key", "name", "phone", "spend", "bills", "first_visit", "last_visit")
+
+
+def as_record(data):
+    """Complete record dict from stored data (missing fields get defaults), or None."""
+    if not isinstance(data, dict) or "key" not in data:
+        return None
+    return {
+        "key": str(data["key"]),
+        "name": str(data.get("name", "")),
+        "phone": str(data.get("phone", "")),
+        "spend": float(data.get("spend", 0) or 0),
+        "bills": int(data.get("bills", 0) or 0),
+        "first_visit": str(data.get("first_visit", "")),
+        "last_visit": str(data.get("last_visit", "")),
+    }
+
+
+def customer_key(name, phone):
+    """Directory key for a bill's customer ("" if it has neither name nor phone)."""
+    digits = phone_key(phone)
+    if digits:
+        return digits
+    name = normalize(name or "")
+    return f"name:{name}" if name else ""
+
+
+class CustomerDirectory:
+    def __init__(self, records=()):
+        self.records = []       # live list (storage isi ko likhta hai)
+        self.by_key = {}        # key -> record
+        self.phones = []        # sorted phone keys
+        self.words = []         # sorted (word, key)
+        for data in records:
+            record = as_record(data)
+            if record is not None:
+                self._insert(record)
+        self.phones.sort()
+        self.words.sort()
+
+    def __len__(self):
+        return len(self.records)
+
+    def _insert(self, record, sort=False):
+        key = record["key"]
+        self.records.append(record)
+        self.by_key[key] = record
+        if not key:
+            return
+        add = insort if sort else list.append
+        if not key.startswith("name:"):
+            add(self.phones, key)
+        for word in set(normalize(record["name"]).split()):
+            add(self.words, (word, key))
+
+    def _rename(self, record, name):
+        key = record["key"]
+        for word in set(normalize(record["name"]).split()):
+            i = bisect_left(self.words, (word, key))
+            if i < len(self.words) and self.words[i] == (word, key):
+                del self.words[i]
+        record["name"] = name
+        for word in set(normalize(name).split()):
+            insort(self.words, (word, key))
+
+    # --------------------------
+    # Updates
+    # --------------------------
+    def add_bill(self, bill):
+        """Count one saved bill; returns the customer's updated record."""
+        name = str(bill.get("customer_name", "")).strip()
+        phone = str(bill.get("customer_phone", "")).strip()
+        date = str(bill.get("date", ""))
+        key = customer_key(name, phone)
+        record = self.by_key.get(key)
+        if record is None:
+            record = {"key": key, "name": name, "phone": phone, "spend": 0.0, "bills": 0,
+                      "first_visit": date, "last_visit": date}
+            self._insert(record, sort=True)
+        else:
+            # sab se taaza naam / phone yaad rakhein
+            if name and name != record["name"] and key:
+                self._rename(record, name)
+            if phone:
+                record["phone"] = phone
+        record["spend"] = round(record["spend"] + float(bill.get("total", 0)), 2)
+        record["bills"] += 1
+        if date and (not record["first_visit"] or date < record["first_visit"]):
+            record["first_visit"] = date
+        if date > record["last_visit"]:
+            record["last_visit"] = date
+        return record
+
+    @classmethod
+    def rebuild(cls, bills):
+        directory = cls()
+        for bill in bills:
+            directory.add_bill(bill)
+        return directory
+
+    # --------------------------
+    # Lookups
+    # --------------------------
+    def get(self, key):
+        return self.by_key.get(key) if key else None
+
+    def find_phone(self, phone):
+        """Record for an exact phone number (any formatting), or None."""
+        return self.get(phone_key(phone))
+
+    @staticmethod
+    def _rank(record):
+        # haal ke aur zyada kharidne wale customers pehle
+        return record["last_visit"], record["spend"]
+
+    def complete_phone(self, text, limit=5):
+        """Customers whose phone starts with the digits typed so far."""
+        digits = phone_key(text)
+        if not digits:
+            return []
+        i = bisect_left(self.phones, digits)
+        keys = []
+        while i < len(self.phones) and self.phones[i].startswith(digits):
+            keys.append(self.phones[i])
+            i += 1
+        return nlargest(limit, (self.by_key[k] for k in keys), key=self._rank)
+
+    def complete_name(self, text, limit=5):
+        """Customers having a name word that starts with each typed word."""
+        query = normalize(text).split()
+        if not query:
+            return []
+        keys = None
+        for part in query:
+            found = set()
+            i = bisect_left(self.words, (part,))
+            while i < len(self.words) and self.words[i][0].startswith(part):
+                found.add(self.words[i][1])
+                i += 1
+            keys = found if keys is None else keys & found
+            if not keys:
+                return []
+        return nlargest(limit, (self.by_key[k] for k in keys), key=self._rank)
+
+    def bill_total(self):
+        """Number of bills counted in this directory."""
+        return sum(r["bills"] for r in self.records)
+
+    def to_list(self):
+        return self.records
@@ -0,0 +1,377 @@
+"""
+HH Bill Book - Shared Data Cache
+--------------------------------
+Process-wide in-memory copy of customers, products, bills and settings.
+
+Har screen pehle apni JSON file khud parse karti thi (search mein to har
+keystroke par). Ab sab screens yahan se data leti hain; disk sirf tab
+parhi jati hai jab data waqai badla ho:
+
+    - app ke andar writes DataService ke through hote hain, jo cache ko
+      seedha update karke dataset ka version counter barhata hai
+    - bahar se hone wali changes (doosra process, manual edit) repository ke
+      change token se pakri jati hain (json: file mtime, sqlite: data_version)
+
+Customers ka directory (customers.py) rollups ki tarah har bill par
+incrementally update hota hai; customers() use pehli dafa bills se banata hai.
+
+Screens subscribe() karke change notification le sakti hain. Listeners
+hamesha deliver(func) ke zariye chalte hain (app mein Clock.schedule_once,
+yani main thread), chahe write ya reload kisi worker thread par hua ho. Products ke
+single-row writes last_change mein (version, (op, product)) bhi chhorte hain,
+taake list sirf badli hui row patch kare.
+"""
+import threading
+
+from search import ProductSearchIndex
+from catalog import ProductCatalog
+from rollups import SalesRollups
+from customers import CustomerDirectory
+
+
+DATASETS = ("customers", "products", "bills", "settings")
+
+
+class DataService:
+    def __init__(self, repo, deliver=None):
+        self.repo = repo
+        # deliver(func): listeners kis thread par chalein; None = usi waqt (headless tools)
+        self.deliver = deliver
+        self.lock = threading.RLock()
+        self._cache = {}      # name -> data
+        self._tokens = {}     # name -> repo change token when cached
+        self.versions = {name: 0 for name in DATASETS}
+        self._listeners = {name: [] for name in DATASETS}
+        self._product_index = None
+        self._catalog = None
+        self._rollups = None
+        self._customers = None
+        self.last_change = {}  # name -> (version, change) of the latest write
+
+    # --------------------------
+    # Invalidation
+    # --------------------------
+    def _get(self, name, default):
+        with self.lock:
+            if name in self._cache and self._tokens.get(name) == self.repo.change_token(name):
+                return self._cache[name]
+            stale = name in self._cache
+            data = self.repo.load(name, default)
+            if name == "products":
+                self._product_index = None
+                self._catalog = None
+            self._cache[name] = data
+            self._tokens[name] = self.repo.change_token(name)
+        if stale:
+            # kisi aur ne file badli hai
+            self._changed(name, touch=False)
+        return data
+
+    def _changed(self, name, touch=True, change=None):
+        with self.lock:
+            self.versions[name] += 1
+            self.last_change[name] = (self.versions[name], change)
+            if touch and name in self._cache:
+                # apna write hai, cache pehle hi update ho chuka
+                self._tokens[name] = self.repo.change_token(name)
+            listeners = list(self._listeners[name])
+        if not listeners:
+            return
+
+        def notify(*_):
+            for cb in listeners:
+                cb(name)
+
+        if self.deliver is None:
+            notify()
+        else:
+            self.deliver(notify)
+
+    def invalidate(self, name=None):
+        with self.lock:
+            names = [name] if name else list(self._cache)
+            for n in names:
+                self._cache.pop(n, None)
+                self._tokens.pop(n, None)
+            self._product_index = None
+            self._catalog = None
+
+    # --------------------------
+    # Subscriptions
+    # --------------------------
+    def subscribe(self, name, callback):
+        """callback(name) is called after the dataset changes."""
+        with self.lock:
+            if callback not in self._listeners[name]:
+                self._listeners[name].append(callback)
+
+    def unsubscribe(self, name, callback):
+        with self.lock:
+            if callback in self._listeners[name]:
+                self._listeners[name].remove(callback)
+
+    # --------------------------
+    # Reads
+    # --------------------------
+    def products(self):
+        return self._get("products", [])
+
+    def bills(self):
+        return self._get("bills", [])
+
+    def bill_count(self):
+        if "bills" in self._cache:
+            return len(self.bills())
+        return self.repo.bill_count()
+
+    def get_bill(self, bill_id):
+        return self.repo.get_bill(bill_id)
+
+    def next_bill_number(self):
+        return self.repo.peek_bill_number()
+
+    def allocate_bill_number(self):
+        return self.repo.allocate_bill_number()
+
+    def bills_page(self, offset, limit, newest_first=False):
+        """One page of bills straight from storage (for virtualized lists)."""
+        return self.repo.bills_page(offset, limit, newest_first)
+
+    def settings(self, default=None):
+        if default is None:
+            default = {"company": "My Company", "logo": ""}
+        settings = self._get("settings", None)
+        return settings if settings is not None else dict(default)
+
+    def product_index(self):
+        """Search index over the cached products, built once and kept in sync."""
+        with self.lock:
+            self.products()
+            if self._product_index is None:
+                self._product_index = ProductSearchIndex(self._cache["products"])
+            return self._product_index
+
+    def search_products(self, text, limit=5):
+        with self.lock:
+            return self.product_index().search(text, limit)
+
+    def catalog(self):
+        """ProductCatalog (hash index by id / name / SKU) over the cached products."""
+        with self.lock:
+            self.products()
+            if self._catalog is None:
+                self._catalog = ProductCatalog(self._cache["products"])
+            return self._catalog
+
+    def find_product(self, name):
+        with self.lock:
+            return self.catalog().find(name)
+
+    def find_product_by_sku(self, sku):
+        with self.lock:
+            return self.catalog().find_sku(sku)
+
+    # --------------------------
+    # Writes (repository + cache update + notify)
+    # --------------------------
+    def add_bill(self, bill):
+        # rollups / customers na bane hon to poori history ka scan yahin, lock ke
+        # bahar (rollups() / customers() khud lock chhor kar banate hain); warna
+        # save ke dauran doosre threads bhi ruk jate. App inhein auto_archive mein
+        # pehle hi bana leti hai.
+        self.rollups()
+        self.customers()
+        with self.lock:
+            rollups = self.rollups()
+            customers = self.customers()
+            self.repo.add_bill(bill)
+            if "bills" in self._cache:
+                self._cache["bills"].append(bill)
+            self.repo.update_rollups(rollups, rollups.add_bill(bill))
+            record = customers.add_bill(bill)
+            self.repo.update_customer(customers, record)
+        self._changed("bills")
+        self._changed("customers", change=("update", record))
+
+    def flush(self):
+        """Write buffered repository changes now (app pause / stop)."""
+        return self.repo.flush()
+
+    def archive_bills(self, before_month):
+        """Move bills older than `before_month` into the compressed archive.
+
+        History (count, pages, totals) stays the same, only its storage
+        changes, so no change notification. Slow: call from a worker thread.
+        """
+        return self.repo.archive_bills(before_month)
+
+    def archive_info(self):
+        return self.repo.archive_info()
+
+    # --------------------------
+    # Sales rollups
+    # --------------------------
+    def rollups(self):
+        """In-memory SalesRollups; built from the raw bills the first time if missing."""
+        with self.lock:
+            if self._rollups is not None:
+                return self._rollups
+            data = self.repo.load_rollups()
+        rollups = SalesRollups(data) if data is not None else None
+        # na hon, ya write-behind flush se pehle crash (totals bills se peeche): dobara banayein.
+        # Poori history ka scan lock ke bahar, taake doosre threads (UI) na rukein
+        rebuilt = rollups is None or rollups.bill_total() != self.repo.bill_count()
+        if rebuilt:
+            rollups = SalesRollups.rebuild(self.repo.iter_bills())
+        with self.lock:
+            if self._rollups is None:
+                self._rollups = rollups
+                if rebuilt:
+                    self.repo.replace_rollups(rollups)
+            return self._rollups
+
+    def check_rollups(self):
+        """Recompute rollups from raw bills (slow, worker thread); returns (fresh, wrong buckets)."""
+        fresh = SalesRollups.rebuild(self.repo.iter_bills())
+        with self.lock:
+            return fresh, self.rollups().mismatches(fresh)
+
+    def apply_rollups(self, fresh):
+        """Replace the rollups with a check_rollups() result and notify (main thread)."""
+        with self.lock:
+            self._rollups = fresh
+            self.repo.replace_rollups(fresh)
+        self._changed("bills")
+
+    # --------------------------
+    # Customer directory
+    # --------------------------
+    def customers(self):
+        """CustomerDirectory (phone / name index, lifetime totals); built from the bills if missing."""
+        with self.lock:
+            if self._customers is not None:
+                return self._customers
+            records = self.repo.load_customers()
+        customers = CustomerDirectory(records) if records is not None else None
+        # rollups() jaisa: na ho ya bills se peeche ho to history scan lock ke bahar
+        rebuilt = customers is None or customers.bill_total() != self.repo.bill_count()
+        if rebuilt:
+            customers = CustomerDirectory.rebuild(self.repo.iter_bills())
+        with self.lock:
+            if self._customers is None:
+                self._customers = customers
+                if rebuilt:
+                    self.repo.replace_customers(customers)
+            return self._customers
+
+    def find_customer(self, phone):
+        with self.lock:
+            record = self.customers().find_phone(phone)
+            return dict(record) if record else None
+
+    def complete_customers(self, text, field="name", limit=5):
+        """Autocomplete by name words or phone prefix; returns record copies."""
+        with self.lock:
+            customers = self.customers()
+            if field == "phone":
+                records = customers.complete_phone(text, limit)
+            else:
+                records = customers.complete_name(text, limit)
+            return [dict(r) for r in records]
+
+    def add_product(self, name, price, sku=""):
+        with self.lock:
+            products = self.products()
+            product = self.repo.add_product(name, price, sku)
+            products.append(product)
+            if self._product_index is not None:
+                self._product_index.add(product)
+            if self._catalog is not None:
+                self._catalog.add(product)
+        self._changed("products", change=("add", product))
+        return product
+
+    def add_products(self, new_products):
+        """Persist several new products in one repository write."""
+        if not new_products:
+            return []
+        with self.lock:
+            products = self.products()
+            added = self.repo.add_products(new_products)
+            products.extend(added)
+            for product in added:
+                if self._product_index is not None:
+                    self._product_index.add(product)
+                if self._catalog is not None:
+                    self._catalog.add(product)
+        self._changed("products", change=("add_many", added))
+        return added
+
+    def import_products(self, new_products, updates):
+        """Bulk insert + update in one repository write (CSV import)."""
+        with self.lock:
+            self.products()
+            added = self.repo.import_products(new_products, updates)
+            changed = {p["id"]: p for p in updates}
+            self._cache["products"] = [changed.get(p["id"], p) for p in self._cache["products"]] + added
+            # bulk change: index dobara banana incremental se sasta
+            self._product_index = None
+            self._catalog = None
+        self._changed("products")
+        return added
+
+    def update_product(self, product_id, name, price, sku=None):
+        with self.lock:
+            products = self.products()
+            product = self.repo.update_product(product_id, name, price, sku)
+            if product:
+                for idx, p in enumerate(products):
+                    if p["id"] == product_id:
+                        products[idx] = product
+                        break
+                if self._product_index is not None:
+                    self._product_index.remove(product_id)
+                    self._product_index.add(product)
+                if self._catalog is not None:
+                    self._catalog.update(product)
+        if product:
+            self._changed("products", change=("update", product))
+        return product
+
+    def remove_product(self, product_id):
+        with self.lock:
+            products = self.products()
+            removed = self.repo.remove_product(product_id)
+            if removed:
+                self._cache["products"] = [p for p in products if p["id"] != product_id]
+                if self._product_index is not None:
+                    self._product_index.remove(product_id)
+                if self._catalog is not None:
+                    self._catalog.remove(product_id)
+        if removed:
+            self._changed("products", change=("remove", removed))
+        return removed
+
+    def save_settings(self, settings):
+        with self.lock:
+            self.repo.save_settings(settings)
+            self._cache["settings"] = dict(settings)
+        self._changed("settings")
+
+
+# --------------------------
+# Process-wide instance
+# --------------------------
+_service = None
+
+
+def init_data_service(repo, deliver=None):
+    global _service
+    _service = DataService(repo, deliver)
+    return _service
+
+
+def get_data_service():
+    if _service is None:
+        raise RuntimeError("Data service not initialised, call init_data_service() first")
+    return _service
@@ -0,0 +1,107 @@
+"""
+HH Bill Book - Background Export Queue
+--------------------------------------
+PDF / JPG rendering worker threads par hoti hai taake UI freeze na ho.
+Har job bill ka snapshot render karti hai; progress, result aur error
+Clock.schedule_once ke zariye Kivy main thread par wapas aate hain.
+Job cancel ho sakti hai (e.g. user screen chhor de).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+
+from renderer import RENDERERS, ExportCancelled, snapshot_bill
+
+
+EXPORT_WORKERS = 2
+
+
+class ExportJob:
+    def __init__(self, kind, bill, settings, file_path, on_done=None, on_error=None, on_progress=None):
+        self.kind = kind
+        self.bill = snapshot_bill(bill)
+        self.settings = dict(settings)
+        self.file_path = file_path
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancelled = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    # --- worker thread ---
+    def _progress(self, fraction):
+        if self.cancelled.is_set():
+            raise ExportCancelled()
+        if self.on_progress:
+            Clock.schedule_once(lambda dt: self._deliver(self.on_progress, fraction))
+
+    def run(self):
+        try:
+            RENDERERS[self.kind](self.bill, self.settings, self.file_path, self._progress)
+        except ExportCancelled:
+            self._cleanup()
+        except Exception as e:
+            self._cleanup()
+            if self.on_error:
+                Clock.schedule_once(lambda dt, e=e: self._deliver(self.on_error, e))
+        else:
+            if self.on_done:
+                Clock.schedule_once(lambda dt: self._deliver(self.on_done))
+
+    def _cleanup(self):
+        try:
+            os.remove(self.file_path + ".part")
+        except OSError:
+            pass
+
+    # --- main thread ---
+    def _deliver(self, callback, *args):
+        # cancel ke baad aane wale callbacks chhor dein
+        if not self.cancelled.is_set():
+            callback(self, *args)
+
+
+class ExportQueue:
+    def __init__(self, workers=EXPORT_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self.lock = threading.Lock()
+        self.jobs = set()
+
+    def submit(self, kind, bill, settings, file_path, on_done=None, on_error=None, on_progress=None):
+        job = ExportJob(kind, bill, settings, file_path, on_done, on_error, on_progress)
+        with self.lock:
+            self.jobs.add(job)
+        job.future = self.pool.submit(job.run)
+        job.future.add_done_callback(lambda f: self._forget(job))
+        return job
+
+    def _forget(self, job):
+        with self.lock:
+            self.jobs.discard(job)
+
+    def cancel_all(self):
+        with self.lock:
+            jobs = list(self.jobs)
+        for job in jobs:
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.pool.shutdown(wait=False)
+
+
+_queue = None
+
+
+def get_export_queue():
+    global _queue
+    if _queue is None:
+        _queue = ExportQueue()
+    return _queue
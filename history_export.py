@@ -0,0 +1,167 @@
+"""
+HH Bill Book - Bill History Export (CSV / JSONL)
+-------------------------------------------------
+Accountant ke liye bills aur un ke items ki tabular export, bills.json ki
+copy ke bajaye. Bills storage se stream hote hain (repo.bills_between) aur
+row by row file mein likhe jate hain, is liye memory history ke size par
+depend nahi karti (1M rows bhi phone par).
+
+    - "csv"   : header ke saath, Excel ke liye UTF-8 BOM
+    - "jsonl" : har line ek JSON object
+    - per="item" : har item ki ek row (bill ki fields har row mein)
+    - per="bill" : har bill ki ek row (item_count + total)
+
+since_last=True par sirf woh bills jo pichli kamyab export ke baad save
+hue (bill numbers monotonic hain, is liye aakhri exported bill ID kafi hai).
+Yeh ID state file (app_data/export_state.json) mein rehti hai, sirf
+export mukammal hone par update hoti hai aur kabhi peeche nahi jati (date
+range wali dobara export pichla marker kam nahi karti).
+"""
+import os
+import csv
+import json
+import datetime
+
+from storage import read_json, write_json
+from renderer import ExportCancelled
+
+
+FORMATS = {
+    "csv": "CSV",
+    "jsonl": "JSON Lines",
+}
+
+ROW_MODES = {
+    "item": "One row per item",
+    "bill": "One row per bill",
+}
+
+BILL_FIELDS = ["bill_id", "date", "customer_name", "customer_phone"]
+ITEM_FIELDS = BILL_FIELDS + ["line", "product", "qty", "price", "item_total", "bill_total"]
+SUMMARY_FIELDS = BILL_FIELDS + ["item_count", "total"]
+
+# itne bills ke baad progress callback
+PROGRESS_EVERY = 200
+
+
+def fields_for(per):
+    return ITEM_FIELDS if per == "item" else SUMMARY_FIELDS
+
+
+def bill_rows(bill, per="item"):
+    """Flat row dicts for one bill."""
+    base = {
+        "bill_id": bill.get("id"),
+        "date": bill.get("date", ""),
+        "customer_name": bill.get("customer_name", ""),
+        "customer_phone": bill.get("customer_phone", ""),
+    }
+    items = bill.get("items", [])
+    if per == "bill":
+        yield dict(base, item_count=len(items), total=bill.get("total", 0))
+        return
+    for line, item in enumerate(items, 1):
+        yield dict(base, line=line, product=item.get("product", ""), qty=item.get("qty", 0),
+                   price=item.get("price", 0), item_total=item.get("total", 0),
+                   bill_total=bill.get("total", 0))
+
+
+class _CsvWriter:
+    def __init__(self, f, fields):
+        self.writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+
+class _JsonlWriter:
+    def __init__(self, f, fields):
+        self.f = f
+
+    def write(self, row):
+        self.f.write(json.dumps(row, ensure_ascii=False))
+        self.f.write("\n")
+
+
+WRITERS = {"csv": _CsvWriter, "jsonl": _JsonlWriter}
+
+
+# --------------------------
+# Incremental state
+# --------------------------
+def load_state(state_path):
+    return read_json(state_path, {}) if state_path else {}
+
+
+def last_exported_id(state_path):
+    """Highest bill ID written by the last completed export, or None."""
+    value = load_state(state_path).get("last_bill_id")
+    return int(value) if value is not None else None
+
+
+def _save_state(state_path, last_id, out_path, bills, rows):
+    write_json(state_path, {
+        "last_bill_id": last_id,
+        "exported_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "path": out_path,
+        "bills": bills,
+        "rows": rows,
+    })
+
+
+# --------------------------
+# Export
+# --------------------------
+def export_history(repo, out_path, fmt="csv", per="item", start=None, end=None,
+                   since_last=False, state_path=None, progress=None, cancelled=None):
+    """Stream bills into a CSV / JSONL file. Returns (bill count, row count).
+
+    Nothing is written (and the state is untouched) if there are no bills
+    to export; the output only appears once it is complete.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if per not in ROW_MODES:
+        raise ValueError(f"Unknown row mode: {per}")
+    after_id = last_exported_id(state_path) if since_last else None
+
+    tmp_path = out_path + ".part"
+    bills = rows = 0
+    last_id = after_id
+    encoding = "utf-8-sig" if fmt == "csv" else "utf-8"
+    try:
+        with open(tmp_path, "w", encoding=encoding, newline="") as f:
+            writer = WRITERS[fmt](f, fields_for(per))
+            for bill in repo.bills_between(start, end, after_id=after_id):
+                if cancelled is not None and cancelled():
+                    raise ExportCancelled()
+                for row in bill_rows(bill, per):
+                    writer.write(row)
+                    rows += 1
+                bills += 1
+                bill_id = int(bill.get("id", 0) or 0)
+                last_id = bill_id if last_id is None else max(last_id, bill_id)
+                if progress and bills % PROGRESS_EVERY == 0:
+                    progress(bills, rows)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+
+    if not bills:
+        _remove(tmp_path)
+        return 0, 0
+    os.replace(tmp_path, out_path)
+    if state_path:
+        previous = last_exported_id(state_path)
+        if previous is not None:
+            last_id = max(previous, last_id)
+        _save_state(state_path, last_id, out_path, bills, rows)
+    return bills, rows
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,158 @@
+"""
+HH Bill Book - Instrumentation
+------------------------------
+Lightweight counters for hot paths: call count, wall-time histogram aur
+bytes read / written. Settings -> Diagnostics screen par dikhte hain aur
+JSON file mein dump ho sakte hain.
+
+Band hone par (default) @timed sirf ek flag check karke asal function
+chala deta hai. HH_DIAGNOSTICS=1 se startup se hi on ho jata hai.
+"""
+import os
+import json
+import time
+import threading
+import functools
+
+
+# histogram bucket upper bounds (ms); aakhri bucket is se upar sab kuch
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Stat:
+    __slots__ = ("count", "total", "max", "buckets", "bytes_read", "bytes_written")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def add_time(self, ms):
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms < bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max, 3),
+            "histogram_ms": {
+                (f"<{b}" if i < len(BUCKETS_MS) else f">={BUCKETS_MS[-1]}"): n
+                for i, (b, n) in enumerate(zip(BUCKETS_MS + (None,), self.buckets)) if n
+            },
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self.enabled = os.environ.get("HH_DIAGNOSTICS") == "1"
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def _stat(self, name):
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats.setdefault(name, Stat())
+        return stat
+
+    def record(self, name, ms):
+        with self.lock:
+            self._stat(name).add_time(ms)
+
+    def add_bytes(self, name, read=0, written=0):
+        with self.lock:
+            stat = self._stat(name)
+            stat.bytes_read += read
+            stat.bytes_written += written
+
+    def snapshot(self):
+        with self.lock:
+            return {name: stat.to_dict() for name, stat in sorted(self.stats.items())}
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+
+recorder = Recorder()
+
+
+# --------------------------
+# Public helpers
+# --------------------------
+def enable(on=True):
+    recorder.enabled = bool(on)
+
+
+def is_enabled():
+    return recorder.enabled
+
+
+def timed(name):
+    """Decorator: record wall time of every call under `name` while enabled."""
+    def deco(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(name, (time.perf_counter() - t0) * 1000)
+        return wrapper
+    return deco
+
+
+def record(name, ms):
+    if recorder.enabled:
+        recorder.record(name, ms)
+
+
+def count_bytes(name, read=0, written=0):
+    if recorder.enabled:
+        recorder.add_bytes(name, read, written)
+
+
+def snapshot():
+    return recorder.snapshot()
+
+
+def reset():
+    recorder.reset()
+
+
+def dump(file_path):
+    data = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "enabled": recorder.enabled,
+        "stats": snapshot(),
+    }
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    return file_path
+
+
+def format_table(stats=None):
+    """Plain text table for the diagnostics screen."""
+    stats = snapshot() if stats is None else stats
+    if not stats:
+        return "No data recorded yet."
+    lines = [f"{'name':<32}{'calls':>7}{'avg ms':>10}{'max ms':>10}{'read KB':>10}{'write KB':>10}"]
+    for name, s in stats.items():
+        lines.append(f"{name[:31]:<32}{s['count']:>7}{s['avg_ms']:>10.2f}{s['max_ms']:>10.2f}"
+                     f"{s['bytes_read'] / 1024:>10.1f}{s['bytes_written'] / 1024:>10.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,228 @@
+"""
+HH Bill Book - Bill Journal
+---------------------------
+Append-only (write-ahead) journal for bills used by the "json" storage backend.
+
+    bills.json           snapshot: {"generation": <g>, "bills": [...]}
+                         (a plain list, the old format, is read as generation 0)
+    bills.journal.jsonl  one line per saved bill: {"g": <g>, "n": <position>, "bill": {...}}
+
+Saving a bill is one appended line (optionally fsync'd). compact() folds the
+journal into the snapshot; startup loads the snapshot and replays only the
+journal tail. A torn last line (crash in the middle of a write) is detected,
+skipped and cut off so the next append starts on a clean line.
+
+replace_all() bumps the generation: the new snapshot is swapped in first and
+the journal truncated after it. If the app dies in between, replay skips the
+old journal lines (their "g" is not the snapshot's), so they are not applied
+to the new, shorter history a second time.
+
+lazy=True par snapshot pehli dafa `bills` parhne par load hota hai (app
+start ko bills.json parse karne ka intezar nahi karna parta).
+"""
+import os
+import json
+import tempfile
+import threading
+
+from instrument import count_bytes
+
+
+class BillJournal:
+    def __init__(self, snapshot_path, journal_path=None, fsync=False, lazy=False):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + ".journal.jsonl"
+        self.fsync = fsync
+        self.lock = threading.RLock()
+        self._bills = None
+        self.journal_entries = 0
+        self.torn_lines = 0
+        self.version = 0
+        # snapshot ke header mein; replace_all() har dafa barhata hai. Replay
+        # isi se purani journal lines pehchanta hai, aur compaction yeh ke
+        # snapshot likhne ke dauran history badal to nahi gayi
+        self.generation = 0
+        self._compacting = False
+        if not lazy:
+            self.load()
+
+    @property
+    def bills(self):
+        if self._bills is None:
+            with self.lock:
+                if self._bills is None:
+                    self.load()
+        return self._bills
+
+    # --------------------------
+    # Startup / replay
+    # --------------------------
+    def load(self):
+        with self.lock:
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                snapshot = []
+            if isinstance(snapshot, dict):
+                self.generation = int(snapshot.get("generation", 0) or 0)
+                self._bills = list(snapshot.get("bills") or [])
+            else:
+                self.generation = 0
+                self._bills = snapshot if isinstance(snapshot, list) else []
+            self.journal_entries = 0
+            self.torn_lines = 0
+            self.version += 1
+            self._replay()
+            return self._bills
+
+    def _replay(self):
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        good_end = 0
+        pos = 0
+        while pos < len(data):
+            nl = data.find(b"\n", pos)
+            if nl == -1:
+                # aakhri line adhi likhi gayi thi (crash), skip
+                self.torn_lines += 1
+                break
+            line = data[pos:nl]
+            pos = nl + 1
+            try:
+                entry = json.loads(line.decode("utf-8"))
+                n, bill = entry["n"], entry["bill"]
+                generation = entry.get("g", 0)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self.torn_lines += 1
+                continue
+            good_end = pos
+            if generation != self.generation:
+                # replace_all() se pehle ki line (journal truncate hone se pehle crash)
+                continue
+            # entries already folded into the snapshot (crash during compaction) are skipped
+            if n == len(self.bills):
+                self.bills.append(bill)
+                self.journal_entries += 1
+        if good_end < len(data):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_end)
+
+    # --------------------------
+    # Writes
+    # --------------------------
+    def append(self, bill):
+        with self.lock:
+            line = json.dumps({"g": self.generation, "n": len(self.bills), "bill": bill}) + "\n"
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                count_bytes("journal.append", written=len(line))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.bills.append(bill)
+            self.journal_entries += 1
+            self.version += 1
+
+    def replace_all(self, bills):
+        """Rewrite the whole history (e.g. Clear History)."""
+        with self.lock:
+            # naya generation pehle snapshot mein; journal truncate na bhi ho
+            # paye to us ki purani lines replay mein skip hoti hain
+            self._write_snapshot(bills, self.generation + 1)
+            self.generation += 1
+            self._truncate_journal()
+            self._bills = list(bills)
+            self.journal_entries = 0
+            self.version += 1
+
+    # --------------------------
+    # Compaction
+    # --------------------------
+    def compact(self):
+        """Fold the journal into the snapshot. Safe to call from a worker thread."""
+        with self.lock:
+            if self._compacting or not self.journal_entries:
+                return False
+            self._compacting = True
+            bills = list(self.bills)
+            generation = self.generation
+            try:
+                journal_size = os.path.getsize(self.journal_path)
+            except OSError:
+                journal_size = 0
+        tmp = None
+        try:
+            # badi file likhna lock ke bahar, is dauran naye bills journal mein aate rahenge
+            tmp = self._dump_snapshot(bills, generation)
+            with self.lock:
+                if self.generation != generation:
+                    # beech mein replace_all() ne poori history badal di: purana snapshot bekaar
+                    return False
+                os.replace(tmp, self.snapshot_path)
+                tmp = None
+                self._drop_journal_head(journal_size)
+                self.journal_entries = len(self.bills) - len(bills)
+        finally:
+            if tmp is not None:
+                _remove(tmp)
+            with self.lock:
+                self._compacting = False
+        return True
+
+    def compact_async(self):
+        t = threading.Thread(target=self.compact, name="bill-journal-compact", daemon=True)
+        t.start()
+        return t
+
+    def _dump_snapshot(self, bills, generation):
+        """Write bills to a new temp file next to the snapshot; returns its path."""
+        # har writer ka apna temp naam, taake compaction aur replace_all takrayein nahi
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.snapshot_path) + ".",
+                                   suffix=".tmp", dir=os.path.dirname(self.snapshot_path) or ".")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"generation": generation, "bills": bills}, f)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            _remove(tmp)
+            raise
+        return tmp
+
+    def _write_snapshot(self, bills, generation):
+        os.replace(self._dump_snapshot(bills, generation), self.snapshot_path)
+
+    def _truncate_journal(self):
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _drop_journal_head(self, size):
+        """Remove the first `size` bytes (already in the snapshot) from the journal."""
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(size)
+                tail = f.read()
+        except OSError:
+            return
+        if not tail:
+            self._truncate_journal()
+            return
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,158 @@
+"""
+HH Bill Book - Background Loader
+--------------------------------
+Screens ka data (bill pages, products, report totals) worker thread par
+parhna aur main thread ko chunks mein dena, taake pehla frame aur screen ka
+placeholder foran dikhe aur list thori thori bharti jaye.
+
+    get_loader().submit(key, produce, on_chunk, on_done=None, chunk_size=200)
+
+produce() worker thread par chalta hai aur koi bhi iterable deta hai. Items
+tukdon mein deliver() ke zariye main thread par on_chunk(list) ko milte hain,
+aakhir mein on_done(). Pehla tukda chunk_size ka hota hai (foran kuch nazar
+aaye), har agla pichle se dugna: RecycleView har tukde par poora layout
+dobara karta hai, is liye barabar tukdon mein kul kaam rows ke square jitna
+ho jata. Agla chunk tab banta hai jab pichla main thread par lag chuka ho, is
+liye ek frame mein ek hi chunk ka kaam hota hai. Usi key ka naya job purane ko cancel kar deta hai; cancel hue job ke
+chunks main thread par drop ho jate hain.
+
+deliver(func) app mein Clock.schedule_once hai.
+"""
+import queue
+import threading
+import traceback
+
+
+CHUNK_SIZE = 200
+WORKERS = 2
+# main thread chunk le le, is ka intezar itne seconds ke wakfon mein (cancel check)
+ACK_POLL = 0.1
+
+
+class LoadJob:
+    def __init__(self, key):
+        self.key = key
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class BackgroundLoader:
+    def __init__(self, deliver, workers=WORKERS):
+        self.deliver = deliver
+        self.lock = threading.Lock()
+        self.jobs = {}  # key -> latest LoadJob
+        self.tasks = queue.Queue()
+        self.threads = []
+        for n in range(workers):
+            t = threading.Thread(target=self._run, name=f"loader-{n}", daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def submit(self, key, produce, on_chunk, on_done=None, on_error=None, chunk_size=CHUNK_SIZE):
+        """Run produce() on a worker; deliver its items in chunks. Returns the LoadJob."""
+        job = LoadJob(key)
+        with self.lock:
+            old = self.jobs.get(key)
+            if old is not None:
+                old.cancel()
+            self.jobs[key] = job
+        self.tasks.put((job, produce, on_chunk, on_done, on_error, chunk_size))
+        return job
+
+    def cancel(self, key):
+        with self.lock:
+            job = self.jobs.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    def busy(self, key):
+        with self.lock:
+            job = self.jobs.get(key)
+        return job is not None and not job.cancelled
+
+    def shutdown(self):
+        with self.lock:
+            for job in self.jobs.values():
+                job.cancel()
+            self.jobs.clear()
+        for _ in self.threads:
+            self.tasks.put(None)
+
+    # --------------------------
+    # Worker side
+    # --------------------------
+    def _run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            self._execute(*task)
+
+    def _execute(self, job, produce, on_chunk, on_done, on_error, chunk_size):
+        if job.cancelled:
+            return
+        try:
+            chunk = []
+            for item in produce():
+                if job.cancelled:
+                    return
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    if not self._send(job, on_chunk, chunk):
+                        return
+                    chunk = []
+                    chunk_size *= 2
+            if chunk and not self._send(job, on_chunk, chunk):
+                return
+        except Exception as e:
+            if on_error is None:
+                traceback.print_exc()
+            self._send(job, self._finish, job, on_error, e, wait=False)
+            return
+        self._send(job, self._finish, job, on_done, wait=False)
+
+    def _finish(self, job, callback, *args):
+        # main thread par: job khatam, phir on_done / on_error
+        with self.lock:
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+        if callback is not None:
+            callback(*args)
+
+    def _send(self, job, func, *args, wait=True):
+        """Run func(*args) on the main thread; with wait, block until it ran. False if cancelled."""
+        done = threading.Event()
+
+        def call(*_):
+            try:
+                if not job.cancelled:
+                    func(*args)
+            finally:
+                done.set()
+
+        self.deliver(call)
+        if wait:
+            while not done.wait(ACK_POLL):
+                if job.cancelled:
+                    return False
+        return not job.cancelled
+
+
+# --------------------------
+# Process-wide instance
+# --------------------------
+_loader = None
+
+
+def init_loader(deliver, workers=WORKERS):
+    global _loader
+    _loader = BackgroundLoader(deliver, workers)
+    return _loader
+
+
+def get_loader():
+    if _loader is None:
+        raise RuntimeError("Loader not initialised, call init_loader() first")
+    return _loader
@@ -8,9 +8,12 @@ Bills کو PDF اور JPG میں بھی export کیا جا سکتا ہے۔
 # --------------------------
 # Imports
 # --------------------------
+import time
+STARTUP_T0 = time.perf_counter()  # cold start measurement (pehli line par)
+
 import os
-import json
 import datetime
+import threading
 from kivy.app import App
 from kivy.uix.screenmanager import ScreenManager, Screen, NoTransition
 from kivy.uix.boxlayout import BoxLayout
@@ -18,18 +21,30 @@ from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.textinput import TextInput
 from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.popup import Popup
+from kivy.uix.spinner import Spinner
+from kivy.uix.togglebutton import ToggleButton
+from kivy.uix.behaviors import ButtonBehavior
 from kivy.uix.image import Image
 from kivy.core.window import Window
+from kivy.clock import Clock
 from kivy.graphics import Color, Rectangle
 from kivy.properties import StringProperty, NumericProperty, ListProperty, ObjectProperty
-from reportlab.pdfgen import canvas
-from PIL import Image as PILImage, ImageDraw
 from kivy.uix.gridlayout import GridLayout
-from kivy.uix.spinner import Spinner
-from kivy.uix.filechooser import FileChooserIconView
+from kivy.utils import platform
 from functools import partial
-from jnius import autoclass, cast
+# reportlab, PIL, jnius aur FileChooser bhaari hain: sirf export / share / browse
+# ke waqt import hote hain, startup par nahi
+from storage import init_repository, get_repository, name_key
+from datacache import init_data_service, get_data_service
+import instrument
+from instrument import timed
+from renderer import snapshot_bill, invalidate_assets, MIME_TYPES
+from exporter import get_export_queue
+from render_cache import init_render_cache, get_render_cache
+from loader import init_loader, get_loader
 
 
 # --------------------------
@@ -37,15 +52,54 @@ from jnius import autoclass, cast
 # --------------------------
 Window.size = (1000, 700)  # PC پر fix size, Mobile پر auto adjust ہوگا
 
+ANDROID = platform == "android"
+
 DATA_DIR = "app_data"
-CUSTOMERS_FILE = os.path.join(DATA_DIR, "customers.json")
-PRODUCTS_FILE = os.path.join(DATA_DIR, "products.json")
-BILLS_FILE = os.path.join(DATA_DIR, "bills.json")
-SETTINGS_FILE = os.path.join(DATA_DIR, "settings.json")
+# accountant export ("sirf naye bills") ki aakhri exported bill ID
+EXPORT_STATE_FILE = os.path.join(DATA_DIR, "export_state.json")
+
+# "sqlite" (app_data/billbook.db) ya "json" (purani files); pehli dafa sqlite
+# khulne par purani JSON files khud import ho jati hain
+STORAGE_BACKEND = "sqlite"
+
+# is mahine + pichle (ARCHIVE_KEEP_MONTHS - 1) mahino ke bills hot store mein,
+# purane app start par compressed monthly archive mein chale jate hain
+ARCHIVE_KEEP_MONTHS = 2
+
+# bill journal (json backend) / WAL (sqlite) ko itne seconds baad background mein compact karein
+COMPACT_INTERVAL = 300
+
+# json backend: products / settings / rollups ki pending writes itne seconds
+# tak jama ho kar ek saath likhi jati hain (on_pause / on_stop par foran)
+WRITE_DELAY = 2.0
+
+# product search: typing rukne ke itne seconds baad search chalay, aur kitne suggestions
+SEARCH_DEBOUNCE = 0.15
+SUGGESTION_LIMIT = 5
+# customer naam / phone autocomplete (same debounce)
+CUSTOMER_SUGGESTIONS = 3
+
+# Reports / History lists storage se itne bills ka page ek waqt mein laati hain
+BILLS_PAGE_SIZE = 50
+# Products list background load: pehla tukda itni rows ka (phir dugne)
+PRODUCT_CHUNK = 200
 
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
+init_repository(DATA_DIR, STORAGE_BACKEND)
+get_repository().on_dirty = Clock.create_trigger(lambda dt: get_repository().flush(), WRITE_DELAY)
+# screens ke listeners hamesha main thread par (writes workers se bhi hote hain)
+init_data_service(get_repository(), deliver=lambda func: Clock.schedule_once(func))
+# Reports se reprint ke liye rendered bills (LRU, size limited)
+init_render_cache(os.path.join(DATA_DIR, "render_cache"))
+# screens ka data worker threads par, chunks main thread par (Clock) aate hain
+init_loader(lambda func: Clock.schedule_once(func))
+
+# Settings -> Diagnostics se on kiya ho to agle start se hi record karein
+if get_data_service().settings().get("diagnostics"):
+    instrument.enable()
+
 # --------------------------
 # Utility Functions
 # --------------------------
@@ -63,17 +117,6 @@ def is_float(s):
     except:
         return False
 
-def load_data(file_path, default):
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return default
-
-def save_data(file_path, data):
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-
 # --------------------------
 # TopBar
 # --------------------------
@@ -138,7 +181,7 @@ class NavigationDrawer(BoxLayout):
 
         menu_items = [
             ("Home", "home"),
-            ("Clear History", "customers"),
+            ("Bill History", "customers"),
             ("Products", "products"),
             ("New Bill", "billing"),
             ("Reports", "reports"),
@@ -179,6 +222,26 @@ class BaseScreen(Screen):
     def on_pre_enter(self):
         if self.nav.manager is None:
             self.nav.manager = self.manager
+        if getattr(self, "_stale", False):
+            self._stale = False
+            self.refresh()
+
+    def watch(self, *datasets):
+        """Refresh this screen when one of the shared datasets changes.
+
+        Hidden screens are only marked stale and refresh on their next visit.
+        """
+        for name in datasets:
+            get_data_service().subscribe(name, self._on_data_changed)
+
+    def _on_data_changed(self, name):
+        if self.manager is not None and self.manager.current == self.name:
+            self.refresh()
+        else:
+            self._stale = True
+
+    def refresh(self):
+        pass
 
     def show_popup(self, title, msg):
         box = BoxLayout(orientation="vertical", padding=10, spacing=10)
@@ -189,6 +252,166 @@ class BaseScreen(Screen):
         btn.bind(on_release=popup.dismiss)
         popup.open()
 
+    def share_file(self, file_path, mime_type="application/pdf"):
+        if ANDROID:
+            self.share_file_android(file_path, mime_type)
+        else:
+            self.show_share_option(file_path)  # Desktop/Laptop fallback
+
+    def show_share_option(self, file_path):
+        layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
+
+        msg = Label(text=f"File saved:\n{file_path}", halign="center")
+        layout.add_widget(msg)
+
+        btn_layout = BoxLayout(size_hint_y=None, height=40, spacing=10)
+        open_btn = Button(text="Open File")
+        folder_btn = Button(text="Open Folder")
+        btn_layout.add_widget(open_btn)
+        btn_layout.add_widget(folder_btn)
+
+        layout.add_widget(btn_layout)
+
+        popup = Popup(title="Share / Open", content=layout, size_hint=(0.8, 0.4))
+
+        def open_file(instance):
+            import webbrowser, os
+            webbrowser.open(file_path)
+            popup.dismiss()
+
+        def open_folder(instance):
+            import os, subprocess
+            folder = os.path.dirname(os.path.abspath(file_path))
+            if os.name == 'nt':  # Windows
+                os.startfile(folder)
+            elif os.name == 'posix':  # Linux/Mac
+                subprocess.Popen(['xdg-open', folder])
+            popup.dismiss()
+
+        open_btn.bind(on_release=open_file)
+        folder_btn.bind(on_release=open_folder)
+
+        popup.open()
+
+    def share_file_android(self, file_path, mime_type="application/pdf"):
+        try:
+            from jnius import autoclass, cast
+
+            PythonActivity = autoclass('org.kivy.android.PythonActivity')
+            Intent = autoclass('android.content.Intent')
+            File = autoclass('java.io.File')
+            Uri = autoclass('android.net.Uri')
+
+            # cast استعمال کرنے کا صحیح طریقہ
+            currentActivity = cast('android.app.Activity', PythonActivity.mActivity)
+
+            file = File(file_path)
+            uri = Uri.fromFile(file)
+  
+            intent = Intent()
+            intent.setAction(Intent.ACTION_SEND)
+            intent.setType(mime_type)
+            intent.putExtra(Intent.EXTRA_STREAM, uri)
+ 
+            chooser = Intent.createChooser(intent, "Share File")
+            currentActivity.startActivity(chooser)
+
+        except Exception as e:
+            print("Share Error:", e)
+
+# --------------------------
+# Paged Bill List (RecycleView)
+# --------------------------
+class BillRow(ButtonBehavior, Label):
+    """One visible row; RecycleView reuses these while scrolling"""
+    bill_id = ObjectProperty(None, allownone=True)
+    picker = ObjectProperty(None, allownone=True)
+
+    def on_release(self):
+        if self.picker is not None and self.bill_id is not None:
+            self.picker(self.bill_id)
+
+
+class PagedBillList(RecycleView):
+    """Virtualized list of bills, newest first.
+
+    Widgets sirf nazar aane wali rows ke liye bante hain, aur bills storage se
+    page by page aate hain jab user neeche scroll karta hai. Page background
+    loader par parha jata hai; tab tak "Loading..." row dikhti hai.
+    """
+    def __init__(self, row_text, row_height=40, font_size=18, empty_text="No bills saved yet",
+                 page_size=BILLS_PAGE_SIZE, picker=None, **kwargs):
+        super().__init__(**kwargs)
+        self.row_text = row_text
+        self.picker = picker  # row tap par picker(bill_id)
+        self.font_size = font_size
+        self.empty_text = empty_text
+        self.page_size = page_size
+        self.loaded = 0
+        self.exhausted = True
+        self.loading = False
+        self.page_rows = 0
+        self.load_key = f"bills:{id(self)}"
+        self.viewclass = BillRow
+        layout = RecycleBoxLayout(orientation="vertical", size_hint_y=None,
+                                  default_size=(None, row_height), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter("height"))
+        self.add_widget(layout)
+        self.bind(scroll_y=self.on_scroll)
+
+    def message_row(self, text):
+        return {"text": text, "font_size": self.font_size, "bill_id": None, "picker": None}
+
+    def reload(self):
+        self.loaded = 0
+        self.exhausted = False
+        self.loading = False
+        self.data = [self.message_row("Loading...")]
+        self.scroll_y = 1
+        self.load_more()
+
+    def load_more(self):
+        if self.exhausted or self.loading:
+            return
+        self.loading = True
+        self.page_rows = 0
+        offset, limit = self.loaded, self.page_size
+
+        def produce():
+            # worker thread: page parhna aur row text banana
+            for b in get_data_service().bills_page(offset, limit, newest_first=True):
+                yield {"text": self.row_text(b), "font_size": self.font_size,
+                       "bill_id": b["id"], "picker": self.picker}
+
+        get_loader().submit(self.load_key, produce, self.add_rows, on_done=self.page_done,
+                            on_error=self.page_failed, chunk_size=max(limit // 2, 1))
+
+    def add_rows(self, rows):
+        if self.loaded == 0 and self.data and self.data[0]["bill_id"] is None:
+            self.data = []
+        self.loaded += len(rows)
+        self.page_rows += len(rows)
+        self.data.extend(rows)
+
+    def page_done(self):
+        self.loading = False
+        # poora page na aaya to history khatam (count page size ka multiple ho tab bhi)
+        self.exhausted = self.page_rows < self.page_size
+        if not self.loaded:
+            self.data = [self.message_row(self.empty_text)]
+
+    def page_failed(self, error):
+        self.loading = False
+        self.exhausted = True
+        if not self.loaded:
+            self.data = [self.message_row(f"Could not load bills: {error}")]
+
+    def on_scroll(self, instance, value):
+        # neeche pohanchne se pehle agla page le aayen
+        if value <= 0.1 and not self.exhausted:
+            self.load_more()
+
+
 # --------------------------
 # Home Screen
 # --------------------------
@@ -235,62 +458,93 @@ class HomeScreen(BaseScreen):
 
 
 
+def archive_cutoff(keep_months=ARCHIVE_KEEP_MONTHS):
+    """"YYYY-MM": bills dated before this month go to the archive."""
+    from bill_archive import add_months
+    return add_months(str(datetime.date.today())[:7], -(keep_months - 1))
+
+
 # --------------------------
-# Customers Screen (Clear History)
+# Customers Screen (Bill History / Archive)
 # --------------------------
 class CustomersScreen(BaseScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         self.content.add_widget(TopBar())
-        title = Label(text="Clear Billing History",
+        title = Label(text="Billing History",
                       font_size=28, bold=True,
                       size_hint_y=None, height=60)
         self.content.add_widget(title)
 
-        clear_btn = Button(text="Clear All History",
-                           font_size=22,
-                           size_hint_y=None,
-                           height=70,
-                           background_color=(1, 0, 0, 1))
-        clear_btn.bind(on_release=lambda x: self.clear_history())
-        self.content.add_widget(clear_btn)
-
-        self.scroll = ScrollView()
-        self.grid = BoxLayout(orientation="vertical", size_hint_y=None, spacing=5, padding=5)
-        self.grid.bind(minimum_height=self.grid.setter("height"))
-        self.scroll.add_widget(self.grid)
-        self.content.add_widget(self.scroll)
+        # Clear History ki jagah: purane mahine compressed archive mein (delete nahi hote)
+        self.archive_btn = Button(text="Archive Old Bills",
+                                  font_size=22,
+                                  size_hint_y=None,
+                                  height=70,
+                                  background_color=(0.2, 0.4, 0.8, 1))
+        self.archive_btn.bind(on_release=lambda x: self.archive_history())
+        self.content.add_widget(self.archive_btn)
+
+        self.count_lbl = Label(font_size=20, bold=True, size_hint_y=None, height=50)
+        self.content.add_widget(self.count_lbl)
+
+        self.list = PagedBillList(row_text=self.row_text, row_height=35, font_size=16,
+                                  empty_text="No billing history found.")
+        self.content.add_widget(self.list)
         self.refresh()
+        self.watch("bills")
+
+    def row_text(self, b):
+        bill_id = b.get("id", "N/A")
+        customer_name = b.get("customer_name", "Unknown")
+        total_amount = b.get("total", 0)
+        return f"Bill No: {bill_id} | Customer: {customer_name} | Total: Rs.{total_amount}"
 
+    @timed("CustomersScreen.refresh")
     def refresh(self):
-        self.grid.clear_widgets()
-        bills = load_data(BILLS_FILE, [])
-        if not bills:
-            lbl = Label(text="No billing history found.", font_size=18,
-                        size_hint_y=None, height=40)
-            self.grid.add_widget(lbl)
-        else:
-            count_lbl = Label(text=f"Total Bills: {len(bills)}",
-                              font_size=20, bold=True,
-                              size_hint_y=None, height=50)
-            self.grid.add_widget(count_lbl)
-            for b in bills[-20:]:
-                bill_id = b.get("id", "N/A")
-                customer_name = b.get("customer_name", "Unknown")
-                total_amount = b.get("total", 0)
-                lbl = Label(
-                    text=f"Bill No: {bill_id} | Customer: {customer_name} | Total: Rs.{total_amount}",
-                    font_size=16,
-                    size_hint_y=None,
-                    height=35
-                )
-                self.grid.add_widget(lbl)
-
-    def clear_history(self):
-        save_data(BILLS_FILE, [])
-        self.show_popup("Success", "All billing history has been cleared.")
-        self.refresh()
+        self.count_lbl.text = "Loading..."
+
+        def produce():
+            data = get_data_service()
+            count = data.bill_count()
+            info = data.archive_info()
+            text = f"Total Bills: {count}" if count else ""
+            if info["bills"]:
+                text += f" ({info['bills']} archived, {info['months']} months)"
+            yield text
+
+        get_loader().submit("customers.count", produce,
+                            lambda texts: setattr(self.count_lbl, "text", texts[0]))
+        self.list.reload()
+
+    def archive_history(self):
+        """Is mahine se pehle ke bills archive karein (background thread)"""
+        cutoff = archive_cutoff(keep_months=1)
+        self.archive_btn.disabled = True
+        self.archive_btn.text = "Archiving..."
+
+        def work():
+            try:
+                moved = get_data_service().archive_bills(cutoff)
+            except Exception as e:
+                Clock.schedule_once(lambda dt, e=e: done(None, e))
+            else:
+                Clock.schedule_once(lambda dt: done(moved, None))
+
+        def done(moved, error):
+            self.archive_btn.disabled = False
+            self.archive_btn.text = "Archive Old Bills"
+            if error is not None:
+                self.show_popup("Error", f"Archive failed: {error}")
+                return
+            self.refresh()
+            if moved:
+                self.show_popup("Success", f"{moved} bills from before {cutoff} archived.")
+            else:
+                self.show_popup("Archive", "No bills older than this month.")
+
+        threading.Thread(target=work, daemon=True).start()
 
 # --------------------------
 # (Rest of your code continues as before… ProductsScreen, BillingScreen, ReportsScreen, SettingsScreen, BillingApp…)
@@ -304,6 +558,29 @@ class CustomersScreen(BaseScreen):
 # --------------------------
 # Products Screen
 # --------------------------
+class ProductRow(BoxLayout):
+    """One product row (recycled); buttons act on the row's product id, not its position"""
+    product_id = NumericProperty(0)
+    text = StringProperty("")
+    owner = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(orientation="horizontal", spacing=10, **kwargs)
+        lbl = Label(size_hint_x=0.6, color=(0,0,0,1))
+        self.bind(text=lbl.setter("text"))
+        self.add_widget(lbl)
+
+        edit_btn = Button(text="Edit", size_hint_x=0.2,
+                          background_color=(0.2,0.4,0.8,1), color=(1,1,1,1))
+        edit_btn.bind(on_release=lambda x: self.owner.edit_product(self.product_id))
+        self.add_widget(edit_btn)
+
+        remove_btn = Button(text="Remove", size_hint_x=0.2,
+                            background_color=(1,0,0,1), color=(1,1,1,1))
+        remove_btn.bind(on_release=lambda x: self.owner.remove_product(self.product_id))
+        self.add_widget(remove_btn)
+
+
 class ProductsScreen(BaseScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -323,61 +600,236 @@ class ProductsScreen(BaseScreen):
 
         self.pname = TextInput(hint_text="Enter Product Name", size_hint_y=None, height=50)
         self.pprice = TextInput(hint_text="Enter Product Price", size_hint_y=None, height=50)
+        self.psku = TextInput(hint_text="Barcode / SKU (optional)", multiline=False,
+                              size_hint_y=None, height=50)
         self.content.add_widget(self.pname)
         self.content.add_widget(self.pprice)
-
-        save_btn = Button(text="Save Product", size_hint_y=None, height=50,
-                          background_color=(0.2, 0.6, 0.2, 1), color=(1,1,1,1))
-        save_btn.bind(on_release=lambda x: self.add_product())
-        self.content.add_widget(save_btn)
-
-        self.scroll = ScrollView()
-        self.grid = BoxLayout(orientation="vertical", size_hint_y=None, spacing=5)
-        self.grid.bind(minimum_height=self.grid.setter("height"))
-        self.scroll.add_widget(self.grid)
-        self.content.add_widget(self.scroll)
+        self.content.add_widget(self.psku)
+
+        btn_row = BoxLayout(orientation="horizontal", size_hint_y=None, height=50, spacing=10)
+        self.save_btn = Button(text="Save Product",
+                               background_color=(0.2, 0.6, 0.2, 1), color=(1,1,1,1))
+        self.save_btn.bind(on_release=lambda x: self.add_product())
+        self.cancel_btn = Button(text="Cancel Edit", size_hint_x=0.3, disabled=True)
+        self.cancel_btn.bind(on_release=lambda x: self.cancel_edit())
+        import_btn = Button(text="Import CSV", size_hint_x=0.4)
+        import_btn.bind(on_release=lambda x: self.browse_import())
+        btn_row.add_widget(self.save_btn)
+        btn_row.add_widget(self.cancel_btn)
+        btn_row.add_widget(import_btn)
+        self.content.add_widget(btn_row)
+        self.editing_id = None
+
+        # in-place filter (debounced, sirf list ka data badalta hai)
+        self.filter_input = TextInput(hint_text="Filter products", multiline=False,
+                                      size_hint_y=None, height=40)
+        self.filter_input.bind(text=lambda inst, value: self._filter_ev())
+        self._filter_ev = Clock.create_trigger(lambda dt: self.apply_filter(), SEARCH_DEBOUNCE)
+        self.content.add_widget(self.filter_input)
+
+        # product id -> product; list ka data isi se banta hai
+        self.rows = {}
+        self.list = RecycleView()
+        self.list.viewclass = ProductRow
+        layout = RecycleBoxLayout(orientation="vertical", size_hint_y=None, spacing=5,
+                                  default_size=(None, 40), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter("height"))
+        self.list.add_widget(layout)
+        self.content.add_widget(self.list)
 
         self.refresh()
+        self.watch("products")
 
-    def refresh(self):
-        self.grid.clear_widgets()
-        products = load_data(PRODUCTS_FILE, [])
-        for idx, p in enumerate(products):
-            row = BoxLayout(orientation="horizontal", size_hint_y=None, height=40, spacing=10)
-
-            lbl = Label(text=f"{p['name']} - Rs. {p['price']}", size_hint_x=0.7, color=(0,0,0,1))
-            row.add_widget(lbl)
+    def row_data(self, p):
+        text = f"{p['name']} - Rs. {p['price']}"
+        if p.get("sku"):
+            text += f"  [{p['sku']}]"
+        return {"product_id": p["id"], "text": text, "owner": self}
 
-            remove_btn = Button(text="Remove", size_hint_x=0.3,
-                                background_color=(1,0,0,1), color=(1,1,1,1))
-            remove_btn.bind(on_release=lambda btn, i=idx: self.remove_product(i))
-            row.add_widget(remove_btn)
+    def matches_filter(self, p):
+        key = self.filter_input.text.strip().lower()
+        return not key or key in p["name"].lower() or key in str(p.get("sku", "")).lower()
 
-            self.grid.add_widget(row)
+    @timed("ProductsScreen.refresh")
+    def refresh(self):
+        # products worker par parhe jate hain aur list chunk by chunk bharti hai
+        data = get_data_service()
+        self.rows = {}
+        self.list.data = []
+        self._version = data.versions["products"]
+        self.loading = True
+        get_loader().submit("products.rows", lambda: list(data.products()), self.add_rows,
+                            on_done=self.rows_done, chunk_size=PRODUCT_CHUNK)
+
+    def add_rows(self, products):
+        for p in products:
+            self.rows[p["id"]] = p
+        self.list.data.extend(self.row_data(p) for p in products if self.matches_filter(p))
+
+    def rows_done(self):
+        self.loading = False
+
+    def apply_filter(self):
+        self.list.data = [self.row_data(p) for p in self.rows.values() if self.matches_filter(p)]
+
+    def _on_data_changed(self, name):
+        # apne (ya kisi bhi) single-row write ke baad sirf wahi row patch karein
+        data = get_data_service()
+        version, change = data.last_change.get(name, (None, None))
+        if change is None or version != self._version + 1 or self.loading:
+            return super()._on_data_changed(name)
+        self._version = version
+        op, product = change
+        if op == "add_many":
+            for p in product:
+                self.patch_row("add", p)
+        else:
+            self.patch_row(op, product)
+
+    def _row_index(self, product_id):
+        for idx, row in enumerate(self.list.data):
+            if row["product_id"] == product_id:
+                return idx
+        return None
+
+    def patch_row(self, op, product):
+        pid = product["id"]
+        idx = self._row_index(pid)
+        if op == "remove":
+            self.rows.pop(pid, None)
+            if idx is not None:
+                self.list.data.pop(idx)
+            return
+        self.rows[pid] = product
+        visible = self.matches_filter(product)
+        if idx is not None and visible:
+            self.list.data[idx] = self.row_data(product)
+        elif idx is not None:
+            self.list.data.pop(idx)
+        elif visible:
+            # id order mein sahi jagah (naye products aam tor par aakhir mein)
+            pos = len(self.list.data)
+            while pos > 0 and self.list.data[pos - 1]["product_id"] > pid:
+                pos -= 1
+            self.list.data.insert(pos, self.row_data(product))
 
     def add_product(self):
         name = self.pname.text.strip()
         price = self.pprice.text.strip()
-        self.content.add_widget(TopBar())
+        sku = self.psku.text.strip()
         if not name or not is_float(price):
             self.show_popup("Error", "Valid name and price required")
             return
-        products = load_data(PRODUCTS_FILE, [])
-        products.append({"name": name, "price": float(price)})
-        save_data(PRODUCTS_FILE, products)
+        data = get_data_service()
+        other = data.find_product_by_sku(sku) if sku else None
+        if other is not None and other["id"] != self.editing_id:
+            self.show_popup("Error", f"SKU {sku} already belongs to '{other['name']}'")
+            return
+        if self.editing_id is not None:
+            updated = data.update_product(self.editing_id, name, float(price), sku)
+            self.cancel_edit()
+            if updated:
+                self.show_popup("Success", f"Product {name} updated")
+            return
+        data.add_product(name, float(price), sku)
         self.pname.text = ""
         self.pprice.text = ""
-        self.refresh()
+        self.psku.text = ""
         self.show_popup("Success", f"Product {name} added")
 
-    def remove_product(self, index):
-        products = load_data(PRODUCTS_FILE, [])
-        if 0 <= index < len(products):
-            removed = products.pop(index)
-            save_data(PRODUCTS_FILE, products)
-            self.refresh()
+    def edit_product(self, product_id):
+        p = self.rows.get(product_id)
+        if p is None:
+            return
+        self.editing_id = product_id
+        self.pname.text = p["name"]
+        self.pprice.text = str(p["price"])
+        self.psku.text = p.get("sku", "")
+        self.save_btn.text = "Update Product"
+        self.cancel_btn.disabled = False
+
+    def cancel_edit(self):
+        self.editing_id = None
+        self.pname.text = ""
+        self.pprice.text = ""
+        self.psku.text = ""
+        self.save_btn.text = "Save Product"
+        self.cancel_btn.disabled = True
+
+    def remove_product(self, product_id):
+        if product_id == self.editing_id:
+            self.cancel_edit()
+        removed = get_data_service().remove_product(product_id)
+        if removed:
             self.show_popup("Removed", f"Product '{removed['name']}' deleted")
 
+    def browse_import(self):
+        """Supplier ki CSV (name, price, sku) chunein"""
+        from kivy.uix.filechooser import FileChooserIconView
+
+        chooser = FileChooserIconView(path=".", filters=["*.csv", "*.CSV"])
+        box = BoxLayout(orientation="vertical")
+        box.add_widget(chooser)
+
+        select_btn = Button(text="Import", size_hint_y=None, height=40)
+        popup = Popup(title="Import Products (CSV)", content=box, size_hint=(0.9, 0.9))
+
+        def select_file(instance):
+            if chooser.selection:
+                popup.dismiss()
+                self.import_csv(chooser.selection[0])
+
+        select_btn.bind(on_release=select_file)
+        box.add_widget(select_btn)
+        popup.open()
+
+    def import_csv(self, file_path):
+        """CSV background thread par parhna / plan; write main thread par, phir summary"""
+        from product_import import plan_csv, apply_import, ImportCancelled
+
+        cancel = threading.Event()
+        box = BoxLayout(orientation="vertical", padding=10, spacing=8)
+        status = Label(text="Reading file...")
+        box.add_widget(status)
+        cancel_btn = Button(text="Cancel", size_hint_y=None, height=40)
+        box.add_widget(cancel_btn)
+        popup = Popup(title="Importing Products", content=box, size_hint=(0.7, 0.4),
+                      auto_dismiss=False)
+        cancel_btn.bind(on_release=lambda x: cancel.set())
+        popup.open()
+
+        def progress(fraction, rows):
+            text = f"Reading... {int(fraction * 100)}%" + (f" ({rows} rows)" if rows else "")
+            Clock.schedule_once(lambda dt: setattr(status, "text", text))
+
+        def work():
+            try:
+                plan = plan_csv(get_data_service(), file_path, progress, cancel.is_set)
+            except ImportCancelled:
+                Clock.schedule_once(lambda dt: finish("Import Cancelled", "No products were changed"))
+            except Exception as e:
+                Clock.schedule_once(lambda dt, e=e: finish("Import Failed", str(e)))
+            else:
+                Clock.schedule_once(lambda dt: apply(plan))
+
+        def apply(plan):
+            # write (aur products listeners) main thread par
+            if cancel.is_set():
+                finish("Import Cancelled", "No products were changed")
+                return
+            try:
+                summary = apply_import(get_data_service(), *plan)
+            except Exception as e:
+                finish("Import Failed", str(e))
+            else:
+                finish("Import Complete", summary.format())
+
+        def finish(title, msg):
+            popup.dismiss()
+            self.show_popup(title, msg)
+
+        threading.Thread(target=work, daemon=True).start()
+
     def show_popup(self, title, msg):
         box = BoxLayout(orientation="vertical", padding=10)
         box.add_widget(Label(text=msg))
@@ -391,7 +843,6 @@ class ProductsScreen(BaseScreen):
 # --------------------------
 # Billing Screen
 # --------------------------
-from kivy.uix.spinner import Spinner   # 👈 یہ import ضرور اوپر شامل کریں
 
 
 class BillingScreen(BaseScreen):
@@ -404,6 +855,7 @@ class BillingScreen(BaseScreen):
         self.customer_name = ""
         self.customer_phone = ""
         self.items = []
+        self.export_jobs = []
 
         # Title
         title = Label(text="Create New Bill",
@@ -433,12 +885,39 @@ class BillingScreen(BaseScreen):
         self.content.add_widget(self.cname)
         self.content.add_widget(self.cphone)
 
-        # Items Title
-        self.content.add_widget(Label(text="Items",
-                                      font_size=22,
-                                      bold=True,
-                                      size_hint_y=None,
-                                      height=40))
+        # purane customers: naam / phone type karte hi directory se suggestions,
+        # poora phone milte hi naam khud bhar jata hai
+        self.cname.bind(text=lambda x, value: self.on_customer_text("name", value))
+        self.cphone.bind(text=lambda x, value: self.on_customer_text("phone", value))
+        self.customer_box = BoxLayout(orientation="horizontal", size_hint_y=None, height=30, spacing=5)
+        self.customer_pool = []
+        for _ in range(CUSTOMER_SUGGESTIONS):
+            btn = Button(font_size=14)
+            btn.customer = None
+            btn.bind(on_release=lambda x: self.select_customer(x.customer))
+            self.customer_pool.append(btn)
+        self.lbl_customer = Label(text="", font_size=14, size_hint_y=None, height=25)
+        self.content.add_widget(self.customer_box)
+        self.content.add_widget(self.lbl_customer)
+        self._customer_query = ("name", "")
+        self._customer_ev = Clock.create_trigger(self.run_customer_search, SEARCH_DEBOUNCE)
+        self._filling_customer = False
+
+        # Items Title + barcode scan (checkout) mode
+        items_row = BoxLayout(orientation="horizontal", size_hint_y=None, height=40, spacing=5)
+        items_row.add_widget(Label(text="Items",
+                                   font_size=22,
+                                   bold=True))
+        self.scan_btn = Button(text="Scan Mode: Off", font_size=16, size_hint_x=0.3)
+        self.scan_btn.bind(on_release=lambda x: self.toggle_scan_mode())
+        # scanner (keyboard wedge) code type karke Enter bhejta hai; focus yahin rehta hai
+        self.scan_input = TextInput(hint_text="Scan barcode / SKU", font_size=16, multiline=False,
+                                    write_tab=False, text_validate_unfocus=False,
+                                    size_hint_x=0.4, disabled=True)
+        self.scan_input.bind(on_text_validate=self.on_scan)
+        items_row.add_widget(self.scan_btn)
+        items_row.add_widget(self.scan_input)
+        self.content.add_widget(items_row)
 
         # Items Grid
         header = BoxLayout(orientation="horizontal", size_hint_y=None, height=40)
@@ -457,9 +936,6 @@ class BillingScreen(BaseScreen):
         # Add Item Row
         add_row = BoxLayout(orientation="horizontal", size_hint_y=None, height=50, spacing=5)
 
-        products = load_data(PRODUCTS_FILE, [])
-        product_names = [p["name"] for p in products]
-
         # 👇 Spinner for product selection
         # Add Item Row with Search Bar + Suggestions
         add_box = BoxLayout(orientation="vertical", size_hint_y=None, height=120)
@@ -487,6 +963,16 @@ class BillingScreen(BaseScreen):
         scroll = ScrollView(size_hint_y=None, height=120)
         scroll.add_widget(self.suggestion_box)
 
+        # suggestion buttons ek dafa banti hain, har search par sirf text badalta hai
+        self.suggestion_pool = []
+        for _ in range(SUGGESTION_LIMIT):
+            btn = Button(size_hint_y=None, height=30, font_size=14)
+            btn.product = None
+            btn.bind(on_release=lambda x: self.select_product(x.product))
+            self.suggestion_pool.append(btn)
+        self._search_query = ""
+        self._search_ev = Clock.create_trigger(self.run_search, SEARCH_DEBOUNCE)
+
         add_box.add_widget(search_row)
         add_box.add_widget(scroll)
 
@@ -509,6 +995,10 @@ class BillingScreen(BaseScreen):
         # 👇 pehle label banao
         self.lbl_total = Label(text="Subtotal: Rs. 0", font_size=18, bold=True, size_hint_y=None, height=40)
         self.content.add_widget(self.lbl_total)
+
+        # background export ka progress
+        self.lbl_status = Label(text="", font_size=14, size_hint_y=None, height=25)
+        self.content.add_widget(self.lbl_status)
  
         # 👇 ab refresh_bill call karo
         self.refresh_bill()
@@ -517,36 +1007,118 @@ class BillingScreen(BaseScreen):
 
     def update_price(self, spinner, text):
         """Product select ہوتے ہی price auto fill ہو جائے"""
-        products = load_data(PRODUCTS_FILE, [])
-        for p in products:
-            if p["name"] == text:
-                self.prod_price.text = str(p["price"])
-                break
+        p = get_data_service().find_product(text)
+        if p:
+            self.prod_price.text = str(p["price"])
 
+    @timed("BillingScreen.refresh_bill")
     def refresh_bill(self):
-        bills = load_data(BILLS_FILE, [])
-        self.bill_id = len(bills) + 1
+        # sirf dikhane ke liye; asal number save karte waqt allocate hota hai
+        self.bill_id = get_data_service().next_bill_number()
         self.lbl_bill_no.text = f"Bill No: {self.bill_id}"
         self.lbl_date.text = f"Date: {datetime.date.today()}"
         self.items = []
+        # is bill mein type kiye gaye naye products; save_bill par ek hi write mein
+        self.new_products = {}
+        # scan se aaye products: product id -> (item, qty label, total label)
+        self.scan_lines = {}
         self.grid.clear_widgets()
         self.lbl_total.text = "Subtotal: Rs. 0"
+        self.lbl_customer.text = ""
 
+    @timed("BillingScreen.on_search_text")
     def on_search_text(self, instance, value):
-        """Filter products while typing"""
-        self.suggestion_box.clear_widgets()
+        """Filter products while typing (debounced)"""
+        self._search_query = value
+        self._search_ev.cancel()
         if not value.strip():
+            self.show_suggestions([])
             return
-
-        products = load_data(PRODUCTS_FILE, [])
-        matches = [p for p in products if value.lower() in p["name"].lower()]
-
-        for p in matches[:5]:  # top 5 suggestions only
-            btn = Button(text=f"{p['name']} (Rs.{p['price']})",
-                         size_hint_y=None, height=30, font_size=14)
-            btn.bind(on_release=lambda x, prod=p: self.select_product(prod))
-            self.suggestion_box.add_widget(btn)
-
+        self._search_ev()
+
+    @timed("BillingScreen.run_search")
+    def run_search(self, *args):
+        matches = get_data_service().search_products(self._search_query, SUGGESTION_LIMIT)
+        self.show_suggestions(matches)
+
+    def show_suggestions(self, matches):
+        for i, btn in enumerate(self.suggestion_pool):
+            if i < len(matches):
+                p = matches[i]
+                btn.product = p
+                btn.text = f"{p['name']} (Rs.{p['price']})"
+                if btn.parent is None:
+                    self.suggestion_box.add_widget(btn)
+            elif btn.parent is not None:
+                btn.product = None
+                self.suggestion_box.remove_widget(btn)
+
+    # --------------------------
+    # Customer autocomplete
+    # --------------------------
+    def on_customer_text(self, field, value):
+        if self._filling_customer:
+            return
+        self.lbl_customer.text = ""
+        self._customer_query = (field, value)
+        self._customer_ev.cancel()
+        if not value.strip():
+            get_loader().cancel("billing.customers")
+            self.show_customers([])
+            return
+        self._customer_ev()
+
+    def run_customer_search(self, *args):
+        field, text = self._customer_query
+
+        def produce():
+            # worker par: pehli dafa directory bills se banti hai
+            data = get_data_service()
+            exact = data.find_customer(text) if field == "phone" else None
+            yield exact, data.complete_customers(text, field, CUSTOMER_SUGGESTIONS)
+
+        get_loader().submit("billing.customers", produce, self.show_customer_matches)
+
+    def show_customer_matches(self, results):
+        exact, matches = results[0]
+        if exact is not None:
+            if not self.cname.text.strip():
+                self.fill_customer(exact)
+            self.show_customer_stats(exact)
+            matches = []
+        self.show_customers(matches)
+
+    def show_customers(self, matches):
+        for i, btn in enumerate(self.customer_pool):
+            if i < len(matches):
+                c = matches[i]
+                btn.customer = c
+                btn.text = f"{c['name']} ({c['phone']})" if c["phone"] else c["name"]
+                if btn.parent is None:
+                    self.customer_box.add_widget(btn)
+            elif btn.parent is not None:
+                btn.customer = None
+                self.customer_box.remove_widget(btn)
+
+    def fill_customer(self, customer):
+        # apni likhi hui text par dobara search na chale
+        self._filling_customer = True
+        try:
+            self.cname.text = customer["name"]
+            if customer["phone"]:
+                self.cphone.text = customer["phone"]
+        finally:
+            self._filling_customer = False
+
+    def select_customer(self, customer):
+        self._customer_ev.cancel()
+        self.fill_customer(customer)
+        self.show_customers([])
+        self.show_customer_stats(customer)
+
+    def show_customer_stats(self, customer):
+        self.lbl_customer.text = (f"{customer['bills']} bills, Rs.{customer['spend']} total, "
+                                  f"last visit {customer['last_visit']}")
 
     def add_item(self):
         name = self.prod_search.text.strip()
@@ -565,18 +1137,13 @@ class BillingScreen(BaseScreen):
         item = {"product": name, "qty": qty, "price": price, "total": total}
         self.items.append(item)
 
-        # اگر product پہلے سے products.json میں نہیں ہے تو add کر دیں
-        products = load_data(PRODUCTS_FILE, [])
-        if not any(p["name"].lower() == name.lower() for p in products):
-            products.append({"name": name, "price": price})
-            save_data(PRODUCTS_FILE, products)
+        # اگر product پہلے سے products.json میں نہیں ہے تو bill save hone par add کر دیں
+        key = name_key(name)
+        if key not in self.new_products and get_data_service().find_product(name) is None:
+            self.new_products[key] = {"name": name, "price": price}
 
         # Grid میں row add
-        self.grid.add_widget(Label(text=name, font_size=16))
-        self.grid.add_widget(Label(text=str(qty), font_size=16))
-        self.grid.add_widget(Label(text=str(price), font_size=16))
-        self.grid.add_widget(Label(text=str(total), font_size=16))
-
+        self.add_line(item)
         self.lbl_total.text = f"Subtotal: Rs. {self.calc_total()}"
 
         # clear fields
@@ -584,12 +1151,59 @@ class BillingScreen(BaseScreen):
         self.prod_qty.text = ""
         self.prod_price.text = ""
 
+    def add_line(self, item):
+        """Append one grid row; returns its (qty, total) labels for in-place updates"""
+        qty_lbl = Label(text=str(item["qty"]), font_size=16)
+        total_lbl = Label(text=str(item["total"]), font_size=16)
+        self.grid.add_widget(Label(text=str(item["product"]), font_size=16))
+        self.grid.add_widget(qty_lbl)
+        self.grid.add_widget(Label(text=str(item["price"]), font_size=16))
+        self.grid.add_widget(total_lbl)
+        return qty_lbl, total_lbl
+
+    # --------------------------
+    # Barcode / SKU checkout
+    # --------------------------
+    def toggle_scan_mode(self):
+        on = self.scan_input.disabled
+        self.scan_input.disabled = not on
+        self.scan_btn.text = f"Scan Mode: {'On' if on else 'Off'}"
+        self.scan_input.focus = on
+
+    def on_scan(self, instance):
+        code = instance.text.strip()
+        instance.text = ""
+        if code:
+            self.scan_code(code)
+
+    def scan_code(self, code, qty=1):
+        """Add the product for a scanned SKU, or bump its line if already on the bill"""
+        product = get_data_service().find_product_by_sku(code)
+        if product is None:
+            # popup scan ki raftar rok deta, is liye sirf status
+            self.lbl_status.text = f"Unknown code: {code}"
+            return None
+        line = self.scan_lines.get(product["id"])
+        if line is None:
+            item = {"product": product["name"], "qty": 0, "price": float(product["price"]), "total": 0}
+            self.items.append(item)
+            line = self.scan_lines[product["id"]] = (item,) + self.add_line(item)
+        item, qty_lbl, total_lbl = line
+        item["qty"] += qty
+        item["total"] = item["qty"] * item["price"]
+        qty_lbl.text = str(item["qty"])
+        total_lbl.text = str(item["total"])
+        self.lbl_total.text = f"Subtotal: Rs. {self.calc_total()}"
+        self.lbl_status.text = f"{product['name']} x{item['qty']}"
+        return item
+
     def select_product(self, product):
         self.prod_search.text = product["name"]
         self.prod_price.text = str(product["price"])
         if not self.prod_qty.text.strip():
             self.prod_qty.text = "1"
-        self.suggestion_box.clear_widgets()
+        self._search_ev.cancel()
+        self.show_suggestions([])
 
 
 
@@ -597,6 +1211,7 @@ class BillingScreen(BaseScreen):
     def calc_total(self):
         return sum(item["total"] for item in self.items)
 
+    @timed("BillingScreen.save_bill")
     def save_bill(self):
         customer_name = self.cname.text.strip()
         customer_phone = self.cphone.text.strip()
@@ -604,6 +1219,10 @@ class BillingScreen(BaseScreen):
             self.show_popup("Error", "Customer name required")
             return
 
+        data = get_data_service()
+        data.add_products(list(self.new_products.values()))
+        self.new_products = {}
+        self.bill_id = data.allocate_bill_number()
         bill = {
             "id": self.bill_id,
             "date": str(datetime.date.today()),
@@ -612,296 +1231,417 @@ class BillingScreen(BaseScreen):
             "items": self.items,
             "total": self.calc_total()
         }
-        bills = load_data(BILLS_FILE, [])
-        bills.append(bill)
-        save_data(BILLS_FILE, bills)
+        data.add_bill(bill)
 
         self.show_popup("Success", f"Bill #{self.bill_id} saved")
         self.refresh_bill()
 
-    from PIL import ImageFont
+    def bill_snapshot(self):
+        """Current form as a plain bill dict (export workers never touch widgets)"""
+        return snapshot_bill({
+            "id": self.bill_id,
+            "date": str(datetime.date.today()),
+            "customer_name": self.cname.text,
+            "customer_phone": self.cphone.text,
+            "items": self.items,
+            "total": self.calc_total(),
+        })
 
+    @timed("BillingScreen.export_jpg")
     def export_jpg(self):
-        from PIL import Image as PILImage, ImageDraw, ImageFont
-        import os
-
-        file_path = f"Bill_{self.bill_id}.jpg"
-
-        # Page size
-        width, height = 600, 900
-        img = PILImage.new("RGB", (width, height), "white")
-        d = ImageDraw.Draw(img)
-
-        # Load settings
-        settings = load_data(SETTINGS_FILE, {"company": "My Company", "logo": ""})
-
-        y = 20
-
-        # --- Company Logo ---
-        logo_path = settings.get("logo", "")
-        if logo_path and os.path.exists(logo_path):
-            try:
-                logo = PILImage.open(logo_path).convert("RGBA")
-                logo.thumbnail((120, 120))
-                img.paste(logo, (width // 2 - logo.width // 2, y), logo)
-                y += logo.height + 20
-            except Exception as e:
-                print("Logo load error:", e)
-
-        # --- Fonts ---
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 32)
-            font_text = ImageFont.truetype("arial.ttf", 22)
-            font_bold = ImageFont.truetype("arial.ttf", 26)
-            font_watermark = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font_title = font_text = font_bold = font_watermark = ImageFont.load_default()
-
-        # --- Company Name Center ---
-        company = settings.get("company", "My Company")
-        bbox = d.textbbox((0, 0), company, font=font_title)
-        text_w = bbox[2] - bbox[0]
-        d.text(((width - text_w) / 2, y), company, font=font_title, fill="black")
-        y += 50
-
-        # --- Bill Info ---
-        d.text((40, y), f"Bill No: {self.bill_id}", font=font_text, fill="black")
-        d.text((350, y), f"Date: {datetime.date.today()}", font=font_text, fill="black")
-        y += 30
-        d.text((40, y), f"Customer: {self.cname.text}", font=font_text, fill="black")
-        y += 25
-        d.text((40, y), f"Phone: {self.cphone.text}", font=font_text, fill="black")
-        y += 40
-
-        # --- Table Header ---
-        d.line((30, y, width - 30, y), fill="black", width=2)
-        y += 10
-        d.text((40, y), "Product", font=font_bold, fill="black")
-        d.text((250, y), "Qty", font=font_bold, fill="black")
-        d.text((330, y), "Price", font=font_bold, fill="black")
-        d.text((450, y), "Total", font=font_bold, fill="black")
-        y += 30
-        d.line((30, y, width - 30, y), fill="black", width=2)
-        y += 20
-
-        # --- Items ---
-        for item in self.items:
-            d.text((40, y), str(item["product"]), font=font_text, fill="black")
-            d.text((250, y), str(item["qty"]), font=font_text, fill="black")
-            d.text((330, y), str(item["price"]), font=font_text, fill="black")
-            d.text((450, y), str(item["total"]), font=font_text, fill="black")
-            y += 25
-
-        # --- Subtotal ---
-        y += 20
-        d.line((250, y, width - 30, y), fill="black", width=2)
-        y += 25
-        d.text((330, y), f"Sub Total: Rs. {self.calc_total()}", font=font_bold, fill="black")
-
-        # --- Watermark at Bottom Center ---
-        watermark = "HH Bill Book"
-        bbox = d.textbbox((0, 0), watermark, font=font_watermark)
-        text_w = bbox[2] - bbox[0]
-        d.text(((width - text_w) / 2, height - 40), watermark, font=font_watermark, fill="gray")
-
-        # Save File
-        img.save(file_path)
-
-        # Share or fallback
-        if ANDROID:
-            self.share_file_android(file_path, "image/jpeg")
-        else:
-            self.show_share_option(file_path)
-
-        
- 
+        self.start_export("jpg")
 
+    @timed("BillingScreen.export_pdf")
     def export_pdf(self):
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.utils import ImageReader
-
-        import os
-
-        file_path = f"Bill_{self.bill_id}.pdf"
-        c = canvas.Canvas(file_path, pagesize=A4)
-        width, height = A4
-
-        # --- Load settings ---
-        settings = load_data(SETTINGS_FILE, {"company": "My Company", "logo": ""})
-
-        y = height - 100  # Start from top
-
-        # --- Company Logo ---
-        logo_path = settings.get("logo", "")
-        if logo_path and os.path.exists(logo_path):
-            try:
-                c.drawImage(ImageReader(logo_path), width/2 - 40, y - 60, 80, 80, preserveAspectRatio=True, mask='auto')
-                y -= 100
-            except Exception as e:
-                print("PDF Logo error:", e)
-
-        # --- Company Name Center ---
-        company = settings.get("company", "My Company")
-        c.setFont("Helvetica-Bold", 20)
-        c.drawCentredString(width/2, y, company)
-        y -= 40
-
-        # --- Bill Info ---
-        c.setFont("Helvetica", 12)
-        c.drawString(50, y, f"Bill No: {self.bill_id}")
-        c.drawRightString(width - 50, y, f"Date: {datetime.date.today()}")
-        y -= 20
-        c.drawString(50, y, f"Customer: {self.cname.text}")
-        y -= 20
-        c.drawString(50, y, f"Phone: {self.cphone.text}")
-        y -= 30
-
-        # --- Table Header ---
-        c.setFont("Helvetica-Bold", 12)
-        c.line(40, y, width - 40, y)
-        y -= 15
-        c.drawString(50, y, "Product")
-        c.drawString(250, y, "Qty")
-        c.drawString(320, y, "Price")
-        c.drawString(400, y, "Total")
-        y -= 15
-        c.line(40, y, width - 40, y)
-        y -= 20
-
-        # --- Items ---
-        c.setFont("Helvetica", 12)
-        for item in self.items:
-            c.drawString(50, y, str(item["product"]))
-            c.drawString(250, y, str(item["qty"]))
-            c.drawString(320, y, str(item["price"]))
-            c.drawString(400, y, str(item["total"]))
-            y -= 20
-
-        # --- Subtotal ---
-        y -= 10
-        c.line(250, y, width - 40, y)
-        y -= 20
-        c.setFont("Helvetica-Bold", 12)
-        c.drawRightString(width - 50, y, f"Sub Total: Rs. {self.calc_total()}")
-
-        # --- Watermark (Bottom Center) ---
-        c.setFont("Helvetica-Oblique", 10)
-        c.setFillGray(0.6, 0.6)  # light gray
-        c.drawCentredString(width/2, 30, "HH Bill Book")
-
-        # Save PDF
-        c.save()
-        
-        if ANDROID:
-            self.share_file_android(file_path, "application/pdf")
-        else:
-            self.show_share_option(file_path)  # Desktop/Laptop fallback
+        self.start_export("pdf")
+
+    def start_export(self, kind):
+        bill = self.bill_snapshot()
+        settings = get_data_service().settings({"company": "My Company", "logo": ""})
+        file_path = f"Bill_{bill['id']}.{kind}"
+        job = get_export_queue().submit(kind, bill, settings, file_path,
+                                        on_done=self.on_export_done,
+                                        on_error=self.on_export_error,
+                                        on_progress=self.on_export_progress)
+        self.export_jobs.append(job)
+        self.lbl_status.text = f"Exporting {kind.upper()}..."
+
+    def on_export_progress(self, job, fraction):
+        self.lbl_status.text = f"Exporting {job.kind.upper()}... {int(fraction * 100)}%"
+
+    def on_export_done(self, job):
+        self.finish_export(job)
+        self.share_file(job.file_path, MIME_TYPES[job.kind])
+
+    def on_export_error(self, job, error):
+        self.finish_export(job)
+        self.show_popup("Error", f"{job.kind.upper()} export failed:\n{error}")
+
+    def finish_export(self, job):
+        if job in self.export_jobs:
+            self.export_jobs.remove(job)
+        if not self.export_jobs:
+            self.lbl_status.text = ""
+
+    def on_leave(self, *args):
+        # screen chhorne par chalti hui exports cancel
+        for job in self.export_jobs:
+            job.cancel()
+        self.export_jobs = []
+        self.lbl_status.text = ""
 
 
+# --------------------------
+# Reports Screen
+# --------------------------
+class ReportsScreen(BaseScreen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
+        self.content.add_widget(TopBar())
 
-    def show_share_option(self, file_path):
-        layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        title = Label(text="Reports",
+                      font_size=28,
+                      bold=True,
+                      size_hint_y=None,
+                      height=60)
+        self.content.add_widget(title)
 
-        msg = Label(text=f"File saved:\n{file_path}", halign="center")
-        layout.add_widget(msg)
+        # Summary (rollups se, poori history scan kiye baghair)
+        summary = BoxLayout(orientation="horizontal", size_hint_y=None, height=60, spacing=10)
+        self.lbl_today = Label(font_size=16, halign="center")
+        self.lbl_month = Label(font_size=16, halign="center")
+        rebuild_btn = Button(text="Verify Totals", font_size=16, size_hint_x=None, width=150)
+        rebuild_btn.bind(on_release=lambda x: self.rebuild_totals())
+        summary.add_widget(self.lbl_today)
+        summary.add_widget(self.lbl_month)
+        summary.add_widget(rebuild_btn)
+        self.content.add_widget(summary)
+
+        export_row = BoxLayout(orientation="horizontal", size_hint_y=None, height=45, spacing=10)
+        batch_btn = Button(text="Batch Export", font_size=16)
+        batch_btn.bind(on_release=lambda x: self.open_batch_export())
+        history_btn = Button(text="Export for Accounts", font_size=16)
+        history_btn.bind(on_release=lambda x: self.open_history_export())
+        export_row.add_widget(batch_btn)
+        export_row.add_widget(history_btn)
+        self.content.add_widget(export_row)
+
+        self.list = PagedBillList(
+            row_text=lambda bill: f"Bill #{bill['id']} - {bill['customer_name']} - Rs.{bill['total']}",
+            picker=self.open_reprint)
+        self.content.add_widget(self.list)
+        self.reprint_job = None
 
-        btn_layout = BoxLayout(size_hint_y=None, height=40, spacing=10)
-        open_btn = Button(text="Open File")
-        folder_btn = Button(text="Open Folder")
-        btn_layout.add_widget(open_btn)
-        btn_layout.add_widget(folder_btn)
+        self.refresh()
+        self.watch("bills")
 
-        layout.add_widget(btn_layout)
+    @timed("ReportsScreen.refresh")
+    def refresh(self):
+        self.refresh_summary()
+        self.list.reload()
+
+    def refresh_summary(self):
+        if not self.lbl_today.text:
+            self.lbl_today.text = "Today: ..."
+            self.lbl_month.text = "This Month: ..."
+
+        def produce():
+            # pehli dafa rollups poori history se bante hain, is liye worker par
+            rollups = get_data_service().rollups()
+            today = datetime.date.today()
+            day = rollups.get("day", str(today))
+            month = rollups.get("month", str(today)[:7])
+            yield (f"Today: Rs.{day['revenue']}\n{day['bills']} bills, {day['items']} items",
+                   f"This Month: Rs.{month['revenue']}\n{month['bills']} bills, {month['items']} items")
+
+        def show(texts):
+            self.lbl_today.text, self.lbl_month.text = texts[0]
+
+        get_loader().submit("reports.summary", produce, show)
+
+    def rebuild_totals(self):
+        """Recompute rollups from raw bills in the background and report the result"""
+        def work():
+            fresh, bad = get_data_service().check_rollups()
+            Clock.schedule_once(lambda dt: done(fresh, bad))
+
+        def done(fresh, bad):
+            # naye totals aur "bills" notification main thread par
+            if bad:
+                get_data_service().apply_rollups(fresh)
+            self.refresh_summary()
+            if bad:
+                self.show_popup("Totals Rebuilt", f"{len(bad)} totals were out of date and have been fixed.")
+            else:
+                self.show_popup("Totals Verified", "All totals match the saved bills.")
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def open_reprint(self, bill_id):
+        """Saved bill ko dobara PDF / JPG banayein ya share karein (rendered cache se)"""
+        box = BoxLayout(orientation="vertical", padding=10, spacing=10)
+        status = Label(text=f"Reprint Bill #{bill_id}", font_size=16)
+        box.add_widget(status)
+
+        btn_row = BoxLayout(size_hint_y=None, height=45, spacing=10)
+        popup = Popup(title="Reprint", content=box, size_hint=(0.7, 0.35))
+        for text, kind, share in (("Save PDF", "pdf", False), ("Save JPG", "jpg", False),
+                                  ("Share", "pdf", True)):
+            btn = Button(text=text)
+            btn.bind(on_release=lambda x, k=kind, sh=share: self.reprint(bill_id, k, sh, status, popup))
+            btn_row.add_widget(btn)
+        close_btn = Button(text="Close")
+        close_btn.bind(on_release=popup.dismiss)
+        btn_row.add_widget(close_btn)
+        box.add_widget(btn_row)
+        popup.bind(on_dismiss=lambda x: self.cancel_reprint())
+        popup.open()
 
-        popup = Popup(title="Share / Open", content=layout, size_hint=(0.8, 0.4))
+    def reprint(self, bill_id, kind, share, status, popup):
+        bill = get_data_service().get_bill(bill_id)
+        if bill is None:
+            status.text = f"Bill #{bill_id} not found"
+            return
+        settings = get_data_service().settings({"company": "My Company", "logo": ""})
+        cache = get_render_cache()
 
-        def open_file(instance):
-            import webbrowser, os
-            webbrowser.open(file_path)
+        def deliver(path):
             popup.dismiss()
+            if share:
+                self.share_file(path, MIME_TYPES[kind])
+            else:
+                # cache wali file ko user ki file ke taur par copy (render nahi)
+                import shutil
+                file_path = f"Bill_{bill_id}.{kind}"
+                shutil.copyfile(path, file_path)
+                self.share_file(file_path, MIME_TYPES[kind])
+
+        cached = cache.lookup(kind, bill, settings)
+        if cached:
+            deliver(cached)
+            return
 
-        def open_folder(instance):
-            import os, subprocess
-            folder = os.path.dirname(os.path.abspath(file_path))
-            if os.name == 'nt':  # Windows
-                os.startfile(folder)
-            elif os.name == 'posix':  # Linux/Mac
-                subprocess.Popen(['xdg-open', folder])
+        def done(job):
+            self.reprint_job = None
+            cache.add(job.file_path)
+            deliver(job.file_path)
+
+        def failed(job, error):
+            self.reprint_job = None
+            status.text = f"{kind.upper()} failed: {error}"
+
+        def progress(job, fraction):
+            status.text = f"Rendering {kind.upper()}... {int(fraction * 100)}%"
+
+        self.cancel_reprint()
+        os.makedirs(cache.cache_dir, exist_ok=True)
+        self.reprint_job = get_export_queue().submit(kind, bill, settings, cache.path_for(kind, bill, settings),
+                                                     on_done=done, on_error=failed, on_progress=progress)
+
+    def cancel_reprint(self):
+        if self.reprint_job is not None:
+            self.reprint_job.cancel()
+            self.reprint_job = None
+
+    def open_batch_export(self):
+        """Date range ya bill IDs chun kar saare bills ek PDF / ZIP mein export karein"""
+        from batch_export import FORMATS
+
+        today = str(datetime.date.today())
+        box = BoxLayout(orientation="vertical", padding=10, spacing=8)
+
+        range_row = BoxLayout(size_hint_y=None, height=40, spacing=5)
+        start_in = TextInput(text=today[:8] + "01", hint_text="From (YYYY-MM-DD)", multiline=False)
+        end_in = TextInput(text=today, hint_text="To (YYYY-MM-DD)", multiline=False)
+        range_row.add_widget(start_in)
+        range_row.add_widget(end_in)
+        box.add_widget(range_row)
+
+        ids_in = TextInput(hint_text="Or bill IDs, e.g. 1,4,10-20", multiline=False,
+                           size_hint_y=None, height=40)
+        box.add_widget(ids_in)
+
+        fmt_spin = Spinner(text=FORMATS["pdf"], values=list(FORMATS.values()),
+                           size_hint_y=None, height=40)
+        box.add_widget(fmt_spin)
+
+        status = Label(text="", font_size=15)
+        box.add_widget(status)
+
+        btn_row = BoxLayout(size_hint_y=None, height=45, spacing=10)
+        export_btn = Button(text="Export")
+        close_btn = Button(text="Close")
+        btn_row.add_widget(export_btn)
+        btn_row.add_widget(close_btn)
+        box.add_widget(btn_row)
+
+        popup = Popup(title="Batch Export", content=box, size_hint=(0.9, 0.6))
+        cancel = threading.Event()
+
+        def close(instance):
+            cancel.set()
             popup.dismiss()
 
-        open_btn.bind(on_release=open_file)
-        folder_btn.bind(on_release=open_folder)
-
+        def start(instance):
+            fmt = next(k for k, v in FORMATS.items() if v == fmt_spin.text)
+            try:
+                from batch_export import parse_bill_ids
+                # ranges aakhri bill number par rukti hain ("1-99999999" poori list nahi banati)
+                last_id = get_data_service().next_bill_number() - 1
+                bill_ids = parse_bill_ids(ids_in.text, last_id) if ids_in.text.strip() else None
+            except ValueError:
+                bill_ids = []
+            if bill_ids == []:
+                # "10-5" jaisi ulti range khali list deti hai; date range par chup chaap na jayein
+                status.text = "Invalid bill IDs"
+                return
+            start_date, end_date = start_in.text.strip(), end_in.text.strip()
+            label = f"{bill_ids[0]}-{bill_ids[-1]}" if bill_ids else f"{start_date}_{end_date}"
+            ext = "pdf" if fmt == "pdf" else "zip"
+            out_path = f"Bills_{label}.{ext}"
+
+            export_btn.disabled = True
+            status.text = "Exporting..."
+            cancel.clear()
+            self.run_batch_export(fmt, out_path, start_date, end_date, bill_ids, cancel,
+                                  status, lambda: setattr(export_btn, "disabled", False))
+
+        export_btn.bind(on_release=start)
+        close_btn.bind(on_release=close)
+        popup.bind(on_dismiss=lambda x: cancel.set())
         popup.open()
 
-    def share_file_android(self, file_path, mime_type="application/pdf"):
-        try:
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            Intent = autoclass('android.content.Intent')
-            File = autoclass('java.io.File')
-            Uri = autoclass('android.net.Uri')
-
-            # cast استعمال کرنے کا صحیح طریقہ
-            currentActivity = cast('android.app.Activity', PythonActivity.mActivity)
-
-            file = File(file_path)
-            uri = Uri.fromFile(file)
-  
-            intent = Intent()
-            intent.setAction(Intent.ACTION_SEND)
-            intent.setType(mime_type)
-            intent.putExtra(Intent.EXTRA_STREAM, uri)
- 
-            chooser = Intent.createChooser(intent, "Share File")
-            currentActivity.startActivity(chooser)
-
-        except Exception as e:
-            print("Share Error:", e)
-
+    def run_batch_export(self, fmt, out_path, start, end, bill_ids, cancel, status, on_finish):
+        from batch_export import export_batch
+        from renderer import ExportCancelled
 
+        settings = get_data_service().settings({"company": "My Company", "logo": ""})
 
+        def progress(n):
+            Clock.schedule_once(lambda dt: setattr(status, "text", f"Exporting... {n} bills"))
 
+        def work():
+            try:
+                count = export_batch(get_repository(), settings, out_path, fmt, start, end, bill_ids,
+                                     progress=progress, cancelled=cancel.is_set)
+            except ExportCancelled:
+                return
+            except Exception as e:
+                Clock.schedule_once(lambda dt, e=e: failed(e))
+            else:
+                Clock.schedule_once(lambda dt: done(count))
+
+        def done(count):
+            on_finish()
+            if not count:
+                status.text = "No bills found"
+                return
+            status.text = f"{count} bills exported"
+            self.share_file(out_path, "application/pdf" if fmt == "pdf" else "application/zip")
+
+        def failed(error):
+            on_finish()
+            status.text = f"Export failed: {error}"
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def open_history_export(self):
+        """Bills / items ki CSV ya JSONL file (accountant ke liye), stream kar ke"""
+        from history_export import FORMATS, ROW_MODES, load_state
+
+        today = str(datetime.date.today())
+        box = BoxLayout(orientation="vertical", padding=10, spacing=8)
+
+        range_row = BoxLayout(size_hint_y=None, height=40, spacing=5)
+        start_in = TextInput(text=today[:8] + "01", hint_text="From (YYYY-MM-DD, blank = all)",
+                             multiline=False)
+        end_in = TextInput(text=today, hint_text="To (YYYY-MM-DD, blank = all)", multiline=False)
+        range_row.add_widget(start_in)
+        range_row.add_widget(end_in)
+        box.add_widget(range_row)
+
+        opt_row = BoxLayout(size_hint_y=None, height=40, spacing=5)
+        fmt_spin = Spinner(text=FORMATS["csv"], values=list(FORMATS.values()))
+        per_spin = Spinner(text=ROW_MODES["item"], values=list(ROW_MODES.values()))
+        opt_row.add_widget(fmt_spin)
+        opt_row.add_widget(per_spin)
+        box.add_widget(opt_row)
+
+        state = load_state(EXPORT_STATE_FILE)
+        since_btn = ToggleButton(text="Only bills since last export", size_hint_y=None, height=40,
+                                 disabled=state.get("last_bill_id") is None)
+        box.add_widget(since_btn)
+
+        last = (f"Last export: up to Bill #{state['last_bill_id']} ({state.get('exported_at', '')})"
+                if state.get("last_bill_id") is not None else "No previous export")
+        status = Label(text=last, font_size=15)
+        box.add_widget(status)
+
+        btn_row = BoxLayout(size_hint_y=None, height=45, spacing=10)
+        export_btn = Button(text="Export")
+        close_btn = Button(text="Close")
+        btn_row.add_widget(export_btn)
+        btn_row.add_widget(close_btn)
+        box.add_widget(btn_row)
+
+        popup = Popup(title="Export for Accounts", content=box, size_hint=(0.9, 0.6))
+        cancel = threading.Event()
+
+        def close(instance):
+            cancel.set()
+            popup.dismiss()
 
+        def start(instance):
+            fmt = next(k for k, v in FORMATS.items() if v == fmt_spin.text)
+            per = next(k for k, v in ROW_MODES.items() if v == per_spin.text)
+            start_date, end_date = start_in.text.strip() or None, end_in.text.strip() or None
+            stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            out_path = f"Bill_History_{stamp}.{fmt}"
+
+            export_btn.disabled = True
+            status.text = "Exporting..."
+            cancel.clear()
+            self.run_history_export(out_path, fmt, per, start_date, end_date, since_btn.state == "down",
+                                    cancel, status, lambda: setattr(export_btn, "disabled", False))
+
+        export_btn.bind(on_release=start)
+        close_btn.bind(on_release=close)
+        popup.bind(on_dismiss=lambda x: cancel.set())
+        popup.open()
 
+    def run_history_export(self, out_path, fmt, per, start, end, since_last, cancel, status, on_finish):
+        from history_export import export_history
+        from renderer import ExportCancelled
 
-# --------------------------
-# Reports Screen
-# --------------------------
-class ReportsScreen(BaseScreen):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+        def progress(bills, rows):
+            Clock.schedule_once(lambda dt: setattr(status, "text", f"Exporting... {bills} bills, {rows} rows"))
 
-        self.content.add_widget(TopBar())
-
-        title = Label(text="Reports",
-                      font_size=28,
-                      bold=True,
-                      size_hint_y=None,
-                      height=60)
-        self.content.add_widget(title)
+        def work():
+            try:
+                bills, rows = export_history(get_repository(), out_path, fmt, per, start, end,
+                                             since_last=since_last, state_path=EXPORT_STATE_FILE,
+                                             progress=progress, cancelled=cancel.is_set)
+            except ExportCancelled:
+                return
+            except Exception as e:
+                Clock.schedule_once(lambda dt, e=e: failed(e))
+            else:
+                Clock.schedule_once(lambda dt: done(bills, rows))
 
-        self.scroll = ScrollView()
-        self.grid = GridLayout(cols=1, size_hint_y=None, row_default_height=40, row_force_default=True)
-        self.grid.bind(minimum_height=self.grid.setter("height"))
-        self.scroll.add_widget(self.grid)
-        self.content.add_widget(self.scroll)
+        def done(bills, rows):
+            on_finish()
+            if not bills:
+                status.text = "No new bills to export" if since_last else "No bills found"
+                return
+            status.text = f"{bills} bills, {rows} rows exported"
+            self.share_file(out_path, "text/csv" if fmt == "csv" else "application/x-ndjson")
 
-        self.refresh()
+        def failed(error):
+            on_finish()
+            status.text = f"Export failed: {error}"
 
-    def refresh(self):
-        self.grid.clear_widgets()
-        bills = load_data(BILLS_FILE, [])
-        if not bills:
-            self.grid.add_widget(Label(text="No bills saved yet", font_size=18))
-            return
-        for bill in bills:
-            lbl = Label(text=f"Bill #{bill['id']} - {bill['customer_name']} - Rs.{bill['total']}",
-                        font_size=18,
-                        size_hint_y=None,
-                        height=40)
-            self.grid.add_widget(lbl)
+        threading.Thread(target=work, daemon=True).start()
 
 
 # --------------------------
@@ -913,9 +1653,12 @@ class SettingsScreen(BaseScreen):
         super().__init__(**kwargs)
         self.title = Label(text="Settings", font_size=22, size_hint_y=None, height=50)
         self.content.add_widget(self.title)
+        # title par 5 dafa tap karne se (chhupi hui) Diagnostics screen khulti hai
+        self._title_taps = []
+        self.title.bind(on_touch_down=self.on_title_touch)
 
         # Load old settings
-        self.settings = load_data(SETTINGS_FILE, {"company": "My Company", "logo": "logo.png"})
+        self.settings = dict(get_data_service().settings({"company": "My Company", "logo": "logo.png"}))
 
         # Company Name Input
         self.cname = TextInput(text=self.settings.get("company", ""), hint_text="Company Name")
@@ -935,7 +1678,18 @@ class SettingsScreen(BaseScreen):
         save_btn.bind(on_release=self.save_settings)
         self.content.add_widget(save_btn)
 
+    def on_title_touch(self, label, touch):
+        if not label.collide_point(*touch.pos):
+            return
+        now = time.time()
+        self._title_taps = [t for t in self._title_taps if now - t < 3] + [now]
+        if len(self._title_taps) >= 5:
+            self._title_taps = []
+            self.manager.current = "diagnostics"
+
     def browse_logo(self, *args):
+        from kivy.uix.filechooser import FileChooserIconView
+
         # File chooser popup
         chooser = FileChooserIconView(path=".", filters=["*.png", "*.jpg", "*.jpeg"])
         box = BoxLayout(orientation="vertical")
@@ -958,6 +1712,8 @@ class SettingsScreen(BaseScreen):
     def save_settings(self, *args):
         import shutil, uuid, os, traceback
         try:
+            # taaza settings (diagnostics screen ne beech mein kuch badla ho), sirf company / logo badlein
+            self.settings = dict(get_data_service().settings({"company": "My Company", "logo": "logo.png"}))
             self.settings["company"] = self.cname.text.strip()[:100]
 
             selected = self.logo_input.text.strip()
@@ -970,29 +1726,159 @@ class SettingsScreen(BaseScreen):
                 shutil.copyfile(selected, dest)
                 self.settings["logo"] = dest
             # اگر کچھ نہ ملا تو پچھلا ہی رہنے دیں یا خالی
-            save_data(SETTINGS_FILE, self.settings)
+            get_data_service().save_settings(self.settings)
+            invalidate_assets()  # cached logo / header band dobara banenge
             self.show_popup("Saved", "Company name and logo updated successfully!")
         except Exception as e:
             self.show_popup("Error", f"Settings save failed:\n{e}")
 
 
 
+# --------------------------
+# Diagnostics Screen (hidden, Settings title par 5 taps)
+# --------------------------
+class DiagnosticsScreen(BaseScreen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.content.add_widget(TopBar())
+        self.content.add_widget(Label(text="Diagnostics", font_size=28, bold=True,
+                                      size_hint_y=None, height=60))
+
+        btn_box = BoxLayout(orientation="horizontal", size_hint_y=None, height=50, spacing=10)
+        self.toggle_btn = Button(font_size=16)
+        self.toggle_btn.bind(on_release=lambda x: self.toggle())
+        refresh_btn = Button(text="Refresh", font_size=16)
+        refresh_btn.bind(on_release=lambda x: self.refresh())
+        reset_btn = Button(text="Reset", font_size=16)
+        reset_btn.bind(on_release=lambda x: self.reset())
+        dump_btn = Button(text="Dump JSON", font_size=16)
+        dump_btn.bind(on_release=lambda x: self.dump())
+        for b in (self.toggle_btn, refresh_btn, reset_btn, dump_btn):
+            btn_box.add_widget(b)
+        self.content.add_widget(btn_box)
+
+        scroll = ScrollView()
+        self.table = Label(font_name="RobotoMono-Regular", font_size=13,
+                           size_hint=(None, None), halign="left", valign="top")
+        self.table.bind(texture_size=self.table.setter("size"))
+        scroll.add_widget(self.table)
+        self.content.add_widget(scroll)
+        self.refresh()
+
+    def refresh(self):
+        on = instrument.is_enabled()
+        self.toggle_btn.text = "Disable" if on else "Enable"
+        self.table.text = instrument.format_table()
+
+    def toggle(self):
+        instrument.enable(not instrument.is_enabled())
+        data = get_data_service()
+        settings = dict(data.settings())
+        settings["diagnostics"] = instrument.is_enabled()
+        data.save_settings(settings)
+        self.refresh()
+
+    def reset(self):
+        instrument.reset()
+        self.refresh()
+
+    def dump(self):
+        file_path = os.path.join(DATA_DIR, f"diagnostics_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        instrument.dump(file_path)
+        self.show_popup("Saved", f"Diagnostics written to:\n{file_path}")
+
+
+# --------------------------
+# Lazy Screen Manager
+# --------------------------
+class LazyScreenManager(ScreenManager):
+    """Screens register a factory and are only built on first navigation"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+
+    def register(self, name, screen_class):
+        self.factories[name] = screen_class
+
+    def ensure_screen(self, name):
+        if not self.has_screen(name) and name in self.factories:
+            self.add_widget(self.factories.pop(name)(name=name))
+
+    def on_current(self, instance, value):
+        if value:
+            self.ensure_screen(value)
+        super().on_current(instance, value)
+
+
 # --------------------------
 # Main App Class
 # --------------------------
 class BillingApp(App):
+    @timed("BillingApp.build")
     def build(self):
         self.title = "Billing App PK (Full Version)"
-
-        sm = ScreenManager(transition=NoTransition())
-        sm.add_widget(HomeScreen(name="home"))
-        sm.add_widget(CustomersScreen(name="customers"))
-        sm.add_widget(ProductsScreen(name="products"))
-        sm.add_widget(BillingScreen(name="billing"))
-        sm.add_widget(ReportsScreen(name="reports"))
-        sm.add_widget(SettingsScreen(name="settings"))
+        self.build_t0 = time.perf_counter()
+
+        sm = LazyScreenManager(transition=NoTransition())
+        sm.register("home", HomeScreen)
+        sm.register("customers", CustomersScreen)
+        sm.register("products", ProductsScreen)
+        sm.register("billing", BillingScreen)
+        sm.register("reports", ReportsScreen)
+        sm.register("settings", SettingsScreen)
+        sm.register("diagnostics", DiagnosticsScreen)
+        sm.current = "home"
+
+        self.build_t1 = time.perf_counter()
         return sm
 
+    def on_start(self):
+        Clock.schedule_interval(lambda dt: get_repository().compact_async(), COMPACT_INTERVAL)
+        threading.Thread(target=self.auto_archive, name="bill-archive", daemon=True).start()
+        Window.bind(on_flip=self.on_first_frame)
+
+    def auto_archive(self):
+        # pehle lazy data (json: bills.json) garam karein, phir hot store mein
+        # sirf haal ke mahine; history wahi rehti hai, sirf jagah badalti hai
+        try:
+            get_repository().preload()
+            get_data_service().archive_bills(archive_cutoff())
+            # rollups aur customer directory (purani install par) pehli dafa poori
+            # history se bante hain; yahin bana lein taake pehla save_bill /
+            # autocomplete main thread par na ruke
+            get_data_service().rollups()
+            get_data_service().customers()
+        except Exception as e:
+            print("Auto archive failed:", e)
+
+    def on_first_frame(self, *args):
+        """Cold start timings (Diagnostics); HH_STARTUP_EXIT=1 print karke band kar deta hai
+        (before/after scripts ke liye)"""
+        Window.unbind(on_flip=self.on_first_frame)
+        ms = lambda t: (t - STARTUP_T0) * 1000
+        now = time.perf_counter()
+        instrument.record("startup.imports", ms(self.build_t0))
+        instrument.record("startup.build", (self.build_t1 - self.build_t0) * 1000)
+        instrument.record("startup.first_frame", ms(now))
+        if os.environ.get("HH_STARTUP_EXIT") == "1":
+            print(f"Startup: imports {ms(self.build_t0):.0f} ms, "
+                  f"build {(self.build_t1 - self.build_t0) * 1000:.0f} ms, "
+                  f"first frame {ms(now):.0f} ms")
+            Clock.schedule_once(lambda dt: self.stop())
+
+    def on_pause(self):
+        # Android background mein app bina on_stop ke maari ja sakti hai
+        get_data_service().flush()
+        return True
+
+    def on_stop(self):
+        get_loader().shutdown()
+        get_export_queue().shutdown()
+        get_data_service().flush()
+        # band hote waqt journal ko snapshot mein fold kar dein
+        get_repository().compact()
+
 
 # --------------------------
 # Run App
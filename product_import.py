@@ -0,0 +1,230 @@
+"""
+HH Bill Book - Product CSV Import
+---------------------------------
+Supplier ki product list (CSV) ek saath import karna. File line by line
+parhi jati hai (poori file memory mein nahi aati); har row validate hoti hai
+aur mojooda catalog se de-duplicate hoti hai:
+
+    - SKU pehle se kisi product ka ho       -> woh product update
+    - warna naam (name_key) pehle se ho     -> woh product update
+    - warna naya product
+    - file mein ek hi product dobara aaye   -> aakhri row jeet-ti hai
+    - SKU ek product ka, naam kisi aur ka   -> row reject (do products ka ek hi
+                                               SKU / naam nahi ho sakta)
+
+Saari changes aakhir mein DataService.import_products() se ek hi write /
+transaction mein jati hain. App mein plan_csv() worker thread par chalta hai
+aur apply_import() main thread par (screens ke listeners wahin chalte hain).
+Columns: name, price, sku (header optional, header na ho to isi tarteeb mein).
+"""
+import os
+import csv
+import math
+
+from storage import name_key
+from catalog import sku_key
+
+
+class ImportCancelled(Exception):
+    """Raised when the user cancels an import; nothing has been written."""
+
+
+# summary mein itne rejected rows ki tafseel
+MAX_ERRORS = 20
+# itni rows ke baad progress callback
+PROGRESS_EVERY = 500
+MAX_NAME_LENGTH = 100
+
+COLUMN_NAMES = {
+    "name": ("name", "product", "product name", "item"),
+    "price": ("price", "rate", "unit price"),
+    "sku": ("sku", "barcode", "code"),
+}
+
+
+def parse_price(text):
+    """Price as float, or None (same rule as main.is_float, minus nan / inf)."""
+    try:
+        value = float(text)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _column_map(header):
+    """Header row -> {"name": idx, ...}, or None if the row is data, not a header."""
+    cells = [c.strip().lower() for c in header]
+    found = {}
+    for field, aliases in COLUMN_NAMES.items():
+        for idx, cell in enumerate(cells):
+            if cell in aliases:
+                found[field] = idx
+                break
+    if "name" in found and "price" in found:
+        return found
+    return None
+
+
+def _decoded_lines(f, progress_state):
+    # binary file se line by line; parhe gaye bytes progress ke liye
+    first = True
+    for raw in f:
+        progress_state[0] += len(raw)
+        line = raw.decode("utf-8", errors="replace")
+        if first:
+            line = line.lstrip("\ufeff")
+            first = False
+        yield line
+
+
+class ImportSummary:
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.rejected = 0
+        self.errors = []   # (line number, reason)
+
+    def reject(self, line, reason):
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, reason))
+
+    def to_dict(self):
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+    def format(self):
+        lines = [f"Inserted: {self.inserted}", f"Updated: {self.updated}",
+                 f"Unchanged: {self.unchanged}", f"Rejected: {self.rejected}"]
+        for line, reason in self.errors:
+            lines.append(f"  line {line}: {reason}")
+        if self.rejected > len(self.errors):
+            lines.append(f"  ... {self.rejected - len(self.errors)} more")
+        return "\n".join(lines)
+
+
+def plan_import(rows, catalog, summary):
+    """Validate + de-duplicate parsed rows; returns (new products, updated products)."""
+    # har product ka ek owner id: mojooda products ka asal id, nayi rows ke
+    # liye -1, -2, ... ; skus / names mein is file ki wajah se badle hue
+    # claims hain (None = chhora hua), baaqi catalog se aate hain
+    new = {}        # negative id -> product dict (no id yet)
+    updates = {}    # id -> updated product dict
+    skus = {}       # sku key -> owner id
+    names = {}      # name key -> owner id
+    matched = set()  # mojooda products jin se koi row mili
+
+    def owner(claims, key, find):
+        if key in claims:
+            return claims[key]
+        product = find(key)
+        return product["id"] if product is not None else None
+
+    def current(oid):
+        return new[oid] if oid < 0 else updates.get(oid) or catalog.get(oid)
+
+    for line, name, price_text, sku in rows:
+        name = name.strip()
+        sku = sku.strip()
+        if not name:
+            summary.reject(line, "missing name")
+            continue
+        if len(name) > MAX_NAME_LENGTH:
+            summary.reject(line, "name too long")
+            continue
+        price = parse_price(price_text.strip())
+        if price is None:
+            summary.reject(line, f"invalid price '{price_text.strip()}'")
+            continue
+
+        key = name_key(name)
+        by_sku = owner(skus, sku_key(sku), catalog.find_sku) if sku else None
+        by_name = owner(names, key, catalog.find)
+        if by_sku is not None and by_name is not None and by_sku != by_name:
+            # SKU ek product ka, naam doosre ka: na SKU chheena ja sakta hai na rename
+            summary.reject(line, f"sku {sku} already used by '{current(by_sku)['name']}'")
+            continue
+
+        oid = by_sku if by_sku is not None else by_name
+        prev = current(oid) if oid is not None else None
+        if oid is None:
+            oid = -1 - len(new)
+        sku = sku or (prev.get("sku", "") if prev else "")
+        if prev is not None:
+            # purana naam / SKU ab is product ka nahi raha
+            if name_key(prev["name"]) != key:
+                names[name_key(prev["name"])] = None
+            if sku_key(prev.get("sku")) and sku_key(prev.get("sku")) != sku_key(sku):
+                skus[sku_key(prev.get("sku"))] = None
+        names[key] = oid
+        if sku:
+            skus[sku_key(sku)] = oid
+
+        if oid < 0:
+            new[oid] = {"name": name, "price": price, "sku": sku}
+            continue
+        existing = catalog.get(oid)
+        matched.add(oid)
+        if (name, price, sku) != (existing["name"], float(existing["price"]), existing.get("sku", "")):
+            updates[oid] = dict(existing, name=name, price=price, sku=sku)
+        else:
+            updates.pop(oid, None)
+
+    summary.unchanged = len(matched) - len(updates)
+    return list(new.values()), list(updates.values())
+
+
+def read_rows(file_path, progress=None, cancelled=None):
+    """Yield (line number, name, price, sku) from a CSV file, streaming."""
+    size = os.path.getsize(file_path) or 1
+    state = [0]
+    with open(file_path, "rb") as f:
+        reader = csv.reader(_decoded_lines(f, state))
+        columns = None
+        for n, row in enumerate(reader, 1):
+            if cancelled is not None and cancelled():
+                raise ImportCancelled()
+            if progress and n % PROGRESS_EVERY == 0:
+                progress(min(state[0] / size, 1.0), n)
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            if columns is None:
+                columns = _column_map(row)
+                if columns is not None:
+                    continue  # header
+                columns = {"name": 0, "price": 1, "sku": 2}
+
+            def cell(field):
+                idx = columns.get(field)
+                return row[idx] if idx is not None and idx < len(row) else ""
+            yield reader.line_num, cell("name"), cell("price"), cell("sku")
+    if progress:
+        progress(1.0, None)
+
+
+def plan_csv(data, file_path, progress=None, cancelled=None):
+    """Read and plan a CSV against DataService `data` without writing; returns (new, updates, summary)."""
+    summary = ImportSummary()
+    new, updates = plan_import(read_rows(file_path, progress, cancelled), data.catalog(), summary)
+    if cancelled is not None and cancelled():
+        raise ImportCancelled()
+    return new, updates, summary
+
+
+def apply_import(data, new, updates, summary):
+    """Write a planned import in one repository write; returns the summary."""
+    data.import_products(new, updates)
+    summary.inserted = len(new)
+    summary.updated = len(updates)
+    return summary
+
+
+def import_products_csv(data, file_path, progress=None, cancelled=None):
+    """Import a CSV into DataService `data` in one write; returns an ImportSummary."""
+    return apply_import(data, *plan_csv(data, file_path, progress, cancelled))
@@ -0,0 +1,127 @@
+"""
+HH Bill Book - Rendered Bill Cache
+----------------------------------
+Saved bills ke rendered PDF / JPG disk par cache hote hain, taake Reports se
+reprint ek file handoff ho, poora render nahi.
+
+    app_data/render_cache/bill_<id>_<settings hash>.<pdf|jpg>
+
+Bill numbers monotonic hain (dobara use nahi hote), is liye bill ID + settings
+hash kafi key hai; company / logo badalne par naya hash ban jata hai. Cache
+ka total size MAX_BYTES se upar jaye to sab se purani istemal hui files
+(LRU) delete hoti hain.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+MAX_BYTES = 50 * 1024 * 1024
+
+
+def settings_hash(settings):
+    """Short digest of the settings that change a rendered bill."""
+    logo = settings.get("logo", "")
+    try:
+        logo_mtime = os.stat(logo).st_mtime_ns if logo else None
+    except OSError:
+        logo_mtime = None
+    key = json.dumps([settings.get("company", "My Company"), logo, logo_mtime])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+class RenderCache:
+    def __init__(self, cache_dir, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = None  # file name -> size, oldest use first
+        self.total = 0
+
+    def _load(self):
+        # pehli lookup par directory scan; mtime = aakhri istemal
+        if self.entries is not None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                st = entry.stat()
+                found.append((st.st_mtime, entry.name, st.st_size))
+        found.sort()
+        self.entries = OrderedDict((name, size) for _, name, size in found)
+        self.total = sum(self.entries.values())
+
+    def path_for(self, kind, bill, settings):
+        name = f"bill_{bill['id']}_{settings_hash(settings)}.{kind}"
+        return os.path.join(self.cache_dir, name)
+
+    def lookup(self, kind, bill, settings):
+        """Cached file path, or None if this bill still has to be rendered."""
+        path = self.path_for(kind, bill, settings)
+        name = os.path.basename(path)
+        with self.lock:
+            self._load()
+            if name not in self.entries:
+                return None
+            try:
+                os.utime(path)
+            except OSError:
+                self.total -= self.entries.pop(name)
+                return None
+            self.entries.move_to_end(name)
+            return path
+
+    def add(self, path):
+        """Register a freshly rendered file and evict least recently used ones."""
+        name = os.path.basename(path)
+        size = os.path.getsize(path)
+        with self.lock:
+            self._load()
+            self.total += size - self.entries.pop(name, 0)
+            self.entries[name] = size
+            self._evict(keep=name)
+
+    def _evict(self, keep=None):
+        while self.total > self.max_bytes and len(self.entries) > 1:
+            name, size = next(iter(self.entries.items()))
+            if name == keep:
+                self.entries.move_to_end(name)
+                continue
+            del self.entries[name]
+            self.total -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self.lock:
+            self._load()
+            for name in list(self.entries):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+            self.entries.clear()
+            self.total = 0
+
+
+# --------------------------
+# Process-wide instance
+# --------------------------
+_cache = None
+
+
+def init_render_cache(cache_dir, max_bytes=MAX_BYTES):
+    global _cache
+    _cache = RenderCache(cache_dir, max_bytes)
+    return _cache
+
+
+def get_render_cache():
+    if _cache is None:
+        raise RuntimeError("Render cache not initialised, call init_render_cache() first")
+    return _cache
@@ -0,0 +1,344 @@
+"""
+HH Bill Book - Bill Renderer
+----------------------------
+PDF (reportlab) aur JPG (PIL) bill rendering, BillingScreen ke widgets se
+alag. Input ek bill snapshot (plain dict) aur settings hain, is liye yeh
+worker thread mein bhi chal sakta hai.
+
+Kivy sirf UI code import karta hai; rendering, storage aur baaki helpers
+Kivy ke baghair rehte hain, taake worker threads, benchmarks aur headless
+tools mein chal sakein.
+
+Output ek file path ho sakta hai (".part" mein likh kar os.replace) ya koi
+bhi writable binary stream; render_bytes() seedha bytes deta hai, taake
+bill ko temp file ke baghair share / cache / benchmark kiya ja sake.
+
+reportlab / PIL sirf render karte waqt import hote hain. Fonts, scaled logo
+aur header band (logo + company name) RenderAssets cache mein rehte hain,
+taake baar baar export par sirf bill ke badalne wale hisse draw hon.
+Settings save hone par invalidate_assets() call karein.
+"""
+import io
+import os
+import copy
+import threading
+
+from instrument import timed
+
+
+class ExportCancelled(Exception):
+    """Raised from a progress callback to abort rendering."""
+
+
+def snapshot_bill(bill):
+    """Deep copy of a bill dict, so the UI can keep editing while a worker renders."""
+    return copy.deepcopy(bill)
+
+
+def _noop(fraction):
+    pass
+
+
+def _write_output(out, write):
+    """Call write(target) for a path (atomically, via .part) or a binary stream."""
+    if hasattr(out, "write"):
+        write(out)
+        return out
+    tmp_path = out + ".part"
+    write(tmp_path)
+    os.replace(tmp_path, out)
+    return out
+
+
+# --------------------------
+# Render asset cache
+# --------------------------
+JPG_WIDTH, JPG_HEIGHT = 600, 900
+
+
+class RenderAssets:
+    """Decoded fonts, scaled logo and pre-rendered header band for one settings state."""
+
+    def __init__(self, settings):
+        self.company = settings.get("company", "My Company")
+        self.logo_path = settings.get("logo", "")
+        self._logo = None
+        self._logo_loaded = False
+        self._fonts = None
+        self._jpg_header = None
+        self.lock = threading.Lock()
+
+    def logo(self):
+        """Logo as RGBA PIL image (thumbnailed to 120px), or None."""
+        with self.lock:
+            if not self._logo_loaded:
+                self._logo_loaded = True
+                if self.logo_path and os.path.exists(self.logo_path):
+                    try:
+                        from PIL import Image as PILImage
+                        logo = PILImage.open(self.logo_path).convert("RGBA")
+                        logo.thumbnail((120, 120))
+                        self._logo = logo
+                    except Exception as e:
+                        print("Logo load error:", e)
+            return self._logo
+
+    def fonts(self):
+        with self.lock:
+            if self._fonts is None:
+                from PIL import ImageFont
+                try:
+                    self._fonts = {
+                        "title": ImageFont.truetype("arial.ttf", 32),
+                        "text": ImageFont.truetype("arial.ttf", 22),
+                        "bold": ImageFont.truetype("arial.ttf", 26),
+                        "watermark": ImageFont.truetype("arial.ttf", 18),
+                    }
+                except OSError:
+                    default = ImageFont.load_default()
+                    self._fonts = dict.fromkeys(("title", "text", "bold", "watermark"), default)
+            return self._fonts
+
+    def jpg_header(self):
+        """(band image, height): logo + centred company name, ready to paste."""
+        logo, fonts = self.logo(), self.fonts()
+        with self.lock:
+            if self._jpg_header is None:
+                from PIL import Image as PILImage, ImageDraw
+
+                y = 20
+                height = y + (logo.height + 20 if logo is not None else 0) + 50
+                band = PILImage.new("RGB", (JPG_WIDTH, height), "white")
+                if logo is not None:
+                    band.paste(logo, (JPG_WIDTH // 2 - logo.width // 2, y), logo)
+                    y += logo.height + 20
+                d = ImageDraw.Draw(band)
+                bbox = d.textbbox((0, 0), self.company, font=fonts["title"])
+                text_w = bbox[2] - bbox[0]
+                d.text(((JPG_WIDTH - text_w) / 2, y), self.company, font=fonts["title"], fill="black")
+                self._jpg_header = (band, height)
+            return self._jpg_header
+
+
+_assets = None
+_assets_lock = threading.Lock()
+
+
+def _logo_stamp(logo_path):
+    try:
+        return os.stat(logo_path).st_mtime_ns
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def get_assets(settings):
+    """Cached RenderAssets for these settings (rebuilt if company / logo changed)."""
+    global _assets
+    key = (settings.get("company", "My Company"), settings.get("logo", ""))
+    key += (_logo_stamp(key[1]),)
+    with _assets_lock:
+        if _assets is None or _assets[0] != key:
+            _assets = (key, RenderAssets(settings))
+        return _assets[1]
+
+
+def invalidate_assets():
+    global _assets
+    with _assets_lock:
+        _assets = None
+
+
+# --------------------------
+# JPG (PIL)
+# --------------------------
+@timed("render_jpg")
+def render_jpg(bill, settings, out, progress=None):
+    """Render a bill as JPEG into `out` (file path or binary stream)."""
+    from PIL import Image as PILImage, ImageDraw
+
+    progress = progress or _noop
+    assets = get_assets(settings)
+
+    # Page size
+    width, height = JPG_WIDTH, JPG_HEIGHT
+    img = PILImage.new("RGB", (width, height), "white")
+
+    # --- Header band (logo + company name, cached) ---
+    header, y = assets.jpg_header()
+    img.paste(header, (0, 0))
+    d = ImageDraw.Draw(img)
+    fonts = assets.fonts()
+    font_text, font_bold, font_watermark = fonts["text"], fonts["bold"], fonts["watermark"]
+    progress(0.3)
+
+    # --- Bill Info ---
+    d.text((40, y), f"Bill No: {bill['id']}", font=font_text, fill="black")
+    d.text((350, y), f"Date: {bill['date']}", font=font_text, fill="black")
+    y += 30
+    d.text((40, y), f"Customer: {bill['customer_name']}", font=font_text, fill="black")
+    y += 25
+    d.text((40, y), f"Phone: {bill['customer_phone']}", font=font_text, fill="black")
+    y += 40
+
+    # --- Table Header ---
+    d.line((30, y, width - 30, y), fill="black", width=2)
+    y += 10
+    d.text((40, y), "Product", font=font_bold, fill="black")
+    d.text((250, y), "Qty", font=font_bold, fill="black")
+    d.text((330, y), "Price", font=font_bold, fill="black")
+    d.text((450, y), "Total", font=font_bold, fill="black")
+    y += 30
+    d.line((30, y, width - 30, y), fill="black", width=2)
+    y += 20
+
+    # --- Items ---
+    items = bill["items"]
+    for n, item in enumerate(items, 1):
+        d.text((40, y), str(item["product"]), font=font_text, fill="black")
+        d.text((250, y), str(item["qty"]), font=font_text, fill="black")
+        d.text((330, y), str(item["price"]), font=font_text, fill="black")
+        d.text((450, y), str(item["total"]), font=font_text, fill="black")
+        y += 25
+        progress(0.3 + 0.6 * n / len(items))
+
+    # --- Subtotal ---
+    y += 20
+    d.line((250, y, width - 30, y), fill="black", width=2)
+    y += 25
+    d.text((330, y), f"Sub Total: Rs. {bill['total']}", font=font_bold, fill="black")
+
+    # --- Watermark at Bottom Center ---
+    watermark = "HH Bill Book"
+    bbox = d.textbbox((0, 0), watermark, font=font_watermark)
+    text_w = bbox[2] - bbox[0]
+    d.text(((width - text_w) / 2, height - 40), watermark, font=font_watermark, fill="gray")
+
+    # Save File
+    result = _write_output(out, lambda target: img.save(target, format="JPEG"))
+    progress(1.0)
+    return result
+
+
+# --------------------------
+# PDF (reportlab)
+# --------------------------
+@timed("render_pdf")
+def render_pdf(bill, settings, out, progress=None):
+    """Render a bill as a one-page A4 PDF into `out` (file path or binary stream)."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+
+    progress = progress or _noop
+
+    def write(target):
+        c = canvas.Canvas(target, pagesize=A4)
+        draw_pdf_page(c, bill, settings, progress)
+        c.save()
+
+    result = _write_output(out, write)
+    progress(1.0)
+    return result
+
+
+def draw_pdf_page(c, bill, settings, progress=None):
+    """Draw one bill on the current page of a reportlab canvas (A4)."""
+    from reportlab.lib.pagesizes import A4
+
+    progress = progress or _noop
+    width, height = A4
+
+    # --- Header (logo + company name) ---
+    # Form XObject: ek document mein header ek hi dafa likha jata hai,
+    # batch PDF ke baaki pages sirf usay reference karte hain
+    y = _pdf_header(c, settings, width, height)
+    progress(0.2)
+
+    # --- Bill Info ---
+    c.setFont("Helvetica", 12)
+    c.drawString(50, y, f"Bill No: {bill['id']}")
+    c.drawRightString(width - 50, y, f"Date: {bill['date']}")
+    y -= 20
+    c.drawString(50, y, f"Customer: {bill['customer_name']}")
+    y -= 20
+    c.drawString(50, y, f"Phone: {bill['customer_phone']}")
+    y -= 30
+
+    # --- Table Header ---
+    c.setFont("Helvetica-Bold", 12)
+    c.line(40, y, width - 40, y)
+    y -= 15
+    c.drawString(50, y, "Product")
+    c.drawString(250, y, "Qty")
+    c.drawString(320, y, "Price")
+    c.drawString(400, y, "Total")
+    y -= 15
+    c.line(40, y, width - 40, y)
+    y -= 20
+
+    # --- Items ---
+    c.setFont("Helvetica", 12)
+    items = bill["items"]
+    for n, item in enumerate(items, 1):
+        c.drawString(50, y, str(item["product"]))
+        c.drawString(250, y, str(item["qty"]))
+        c.drawString(320, y, str(item["price"]))
+        c.drawString(400, y, str(item["total"]))
+        y -= 20
+        progress(0.2 + 0.7 * n / len(items))
+
+    # --- Subtotal ---
+    y -= 10
+    c.line(250, y, width - 40, y)
+    y -= 20
+    c.setFont("Helvetica-Bold", 12)
+    c.drawRightString(width - 50, y, f"Sub Total: Rs. {bill['total']}")
+
+    # --- Watermark (Bottom Center) ---
+    c.setFont("Helvetica-Oblique", 10)
+    c.setFillGray(0.6, 0.6)  # light gray
+    c.drawCentredString(width/2, 30, "HH Bill Book")
+
+
+def _pdf_header(c, settings, width, height):
+    """Draw the cached header form on c; returns the y below it."""
+    assets = get_assets(settings)
+    logo = assets.logo()
+    y = height - 100
+    if logo is not None:
+        y -= 100
+    name = "hh_header_%x" % (hash((assets.company, assets.logo_path)) & 0xffffffff)
+    if not c.hasForm(name):
+        from reportlab.lib.utils import ImageReader
+
+        c.beginForm(name)
+        top = height - 100
+        if logo is not None:
+            try:
+                c.drawImage(ImageReader(logo), width/2 - 40, top - 60, 80, 80,
+                            preserveAspectRatio=True, mask='auto')
+                top -= 100
+            except Exception as e:
+                print("PDF Logo error:", e)
+        c.setFont("Helvetica-Bold", 20)
+        c.drawCentredString(width/2, top, assets.company)
+        c.endForm()
+    c.doForm(name)
+    return y - 40
+
+
+RENDERERS = {
+    "pdf": render_pdf,
+    "jpg": render_jpg,
+}
+
+def render_bytes(kind, bill, settings, progress=None):
+    """Render a bill in memory and return the encoded file ("pdf" / "jpg")."""
+    buf = io.BytesIO()
+    RENDERERS[kind](bill, settings, buf, progress)
+    return buf.getvalue()
+
+
+MIME_TYPES = {
+    "pdf": "application/pdf",
+    "jpg": "image/jpeg",
+}
@@ -0,0 +1,105 @@
+"""
+HH Bill Book - Sales Rollups
+----------------------------
+Incrementally maintained totals, taake Reports ko har total ke liye poori
+bill history scan na karni pare.
+
+Har bill save hone par yeh buckets update hote hain:
+
+    day       "2026-10-18"    revenue, bill count, item count (qty)
+    month     "2026-10"
+    product   product name (lower case)
+    customer  customer phone (sirf digits)
+
+rebuild() raw bills se sab kuch dobara calculate karta hai (verification ke liye).
+"""
+KINDS = ("day", "month", "product", "customer")
+
+# float totals ka farq is se kam ho to barabar samjha jaye
+TOLERANCE = 0.005
+
+
+def phone_key(phone):
+    return "".join(ch for ch in str(phone or "") if ch.isdigit())
+
+
+def bill_deltas(bill):
+    """(kind, key, revenue, bills, items) rows one bill adds to the rollups."""
+    date = str(bill.get("date", ""))
+    items = bill.get("items", [])
+    qty = sum(int(it.get("qty", 0)) for it in items)
+    total = float(bill.get("total", 0))
+
+    deltas = [("day", date, total, 1, qty), ("month", date[:7], total, 1, qty)]
+
+    per_product = {}
+    for it in items:
+        key = str(it.get("product", "")).strip().lower()
+        rev, q = per_product.get(key, (0.0, 0))
+        per_product[key] = (rev + float(it.get("total", 0)), q + int(it.get("qty", 0)))
+    for key, (rev, q) in per_product.items():
+        deltas.append(("product", key, rev, 1, q))
+
+    phone = phone_key(bill.get("customer_phone", ""))
+    if phone:
+        deltas.append(("customer", phone, total, 1, qty))
+    return deltas
+
+
+class SalesRollups:
+    def __init__(self, data=None):
+        # kind -> key -> [revenue, bills, items]
+        self.data = {kind: {} for kind in KINDS}
+        if data:
+            for kind, buckets in data.items():
+                self.data.setdefault(kind, {}).update(
+                    {key: list(vals) for key, vals in buckets.items()})
+
+    def apply(self, deltas):
+        for kind, key, revenue, bills, items in deltas:
+            row = self.data[kind].setdefault(key, [0.0, 0, 0])
+            row[0] += revenue
+            row[1] += bills
+            row[2] += items
+
+    def add_bill(self, bill):
+        deltas = bill_deltas(bill)
+        self.apply(deltas)
+        return deltas
+
+    def get(self, kind, key):
+        revenue, bills, items = self.data[kind].get(key, (0.0, 0, 0))
+        return {"revenue": round(revenue, 2), "bills": bills, "items": items}
+
+    def top(self, kind, n=5):
+        ranked = sorted(self.data[kind].items(), key=lambda kv: -kv[1][0])[:n]
+        return [(key, self.get(kind, key)) for key, _ in ranked]
+
+    def bill_total(self):
+        """Number of bills counted in these rollups."""
+        return sum(row[1] for row in self.data["day"].values())
+
+    def to_dict(self):
+        return self.data
+
+    # --------------------------
+    # Verification
+    # --------------------------
+    @classmethod
+    def rebuild(cls, bills):
+        rollups = cls()
+        for bill in bills:
+            rollups.add_bill(bill)
+        return rollups
+
+    def mismatches(self, other):
+        """(kind, key) buckets where self and other disagree."""
+        bad = []
+        for kind in KINDS:
+            mine, theirs = self.data[kind], other.data[kind]
+            for key in set(mine) | set(theirs):
+                a = mine.get(key, (0.0, 0, 0))
+                b = theirs.get(key, (0.0, 0, 0))
+                if abs(a[0] - b[0]) > TOLERANCE or a[1] != b[1] or a[2] != b[2]:
+                    bad.append((kind, key))
+        return bad
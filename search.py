@@ -0,0 +1,151 @@
+"""
+HH Bill Book - Product Search Index
+-----------------------------------
+In-memory index for BillingScreen suggestions.
+
+    - word prefix index : sorted (word, id) list, bisect se prefix range
+                          (1-2 character queries ke liye)
+    - trigram index     : trigram -> ids, substring aur typo-tolerant matches
+
+Index ek dafa banta hai aur product add/remove par incrementally update hota
+hai. Agar naya query pichle query ko aage barhata hai ("sug" -> "suga") to
+pichle result set ko hi filter kiya jata hai, poora catalog dobara nahi.
+"""
+from bisect import bisect_left, insort
+from heapq import nsmallest
+
+
+def normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProductSearchIndex:
+    # itne characters se chhote query par trigram index kaam nahi karta
+    MIN_TRIGRAM_QUERY = 3
+    # typo matching: query ke kam az kam itne trigrams milne chahiye
+    FUZZY_MIN_SCORE = 0.5
+
+    def __init__(self, products=()):
+        self.products = {}      # id -> product dict
+        self.keys = {}          # id -> normalized name
+        self.words = []         # sorted (word, id)
+        self.grams = {}         # trigram -> set(ids)
+        self._last_query = None
+        self._last_ids = None
+        self._build(products)
+
+    def _build(self, products):
+        # pehli dafa bulk build: words ek hi dafa sort hote hain
+        for p in products:
+            pid = p["id"]
+            key = normalize(p["name"])
+            self.products[pid] = p
+            self.keys[pid] = key
+            self.words.extend((word, pid) for word in set(key.split()))
+            for g in trigrams(key):
+                self.grams.setdefault(g, set()).add(pid)
+        self.words.sort()
+
+    def __len__(self):
+        return len(self.products)
+
+    # --------------------------
+    # Incremental updates
+    # --------------------------
+    def add(self, product):
+        pid = product["id"]
+        if pid in self.products:
+            self.remove(pid)
+        key = normalize(product["name"])
+        self.products[pid] = product
+        self.keys[pid] = key
+        for word in set(key.split()):
+            insort(self.words, (word, pid))
+        for g in trigrams(key):
+            self.grams.setdefault(g, set()).add(pid)
+        self._last_query = None
+
+    def remove(self, product_id):
+        key = self.keys.pop(product_id, None)
+        if key is None:
+            return None
+        for word in set(key.split()):
+            i = bisect_left(self.words, (word, product_id))
+            if i < len(self.words) and self.words[i] == (word, product_id):
+                del self.words[i]
+        for g in trigrams(key):
+            ids = self.grams.get(g)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self.grams[g]
+        self._last_query = None
+        return self.products.pop(product_id)
+
+    # --------------------------
+    # Matching
+    # --------------------------
+    def _substring_ids(self, query):
+        """All ids whose name contains query (narrowed from the previous query if possible)."""
+        last = self._last_query
+        if last is not None and len(last) >= self.MIN_TRIGRAM_QUERY and query.startswith(last):
+            candidates = self._last_ids
+        else:
+            sets = []
+            for g in trigrams(query):
+                ids = self.grams.get(g)
+                if not ids:
+                    return set()
+                sets.append(ids)
+            sets.sort(key=len)
+            candidates = set(sets[0]).intersection(*sets[1:])
+        return {pid for pid in candidates if query in self.keys[pid]}
+
+    def _prefix_ids(self, query):
+        """Ids having a word that starts with query."""
+        ids = set()
+        i = bisect_left(self.words, (query,))
+        while i < len(self.words) and self.words[i][0].startswith(query):
+            ids.add(self.words[i][1])
+            i += 1
+        return ids
+
+    def _fuzzy_ids(self, query, exclude, limit):
+        qgrams = trigrams(query)
+        if len(qgrams) < 2:
+            return []
+        scores = {}
+        for g in qgrams:
+            for pid in self.grams.get(g, ()):
+                if pid not in exclude:
+                    scores[pid] = scores.get(pid, 0) + 1
+        need = self.FUZZY_MIN_SCORE * len(qgrams)
+        ranked = sorted((pid for pid, s in scores.items() if s >= need),
+                        key=lambda pid: (-scores[pid], self.keys[pid]))
+        return ranked[:limit]
+
+    def search(self, text, limit=5, fuzzy=True):
+        """Best `limit` products for text: name prefix, word prefix, substring, then typos."""
+        query = normalize(text)
+        if not query:
+            return []
+        if len(query) < self.MIN_TRIGRAM_QUERY:
+            ids = self._prefix_ids(query)
+        else:
+            ids = self._substring_ids(query)
+        self._last_query, self._last_ids = query, ids
+
+        keys = self.keys
+        padded = " " + query
+        ranked = nsmallest(limit, ids, key=lambda pid: (
+            not keys[pid].startswith(query),
+            padded not in " " + keys[pid],
+            keys[pid],
+        ))
+        if fuzzy and len(ranked) < limit:
+            ranked += self._fuzzy_ids(query, ids, limit - len(ranked))
+        return [self.products[pid] for pid in ranked]
@@ -0,0 +1,1156 @@
+"""
+HH Bill Book - Storage Layer
+----------------------------
+Repository layer jo main.py ke load_data / save_data ke peeche kaam karta hai.
+Screens ab poori JSON file parse karne ke bajaye seedha repository se
+query kar sakti hain (single bill insert, product lookup, paging, waghera).
+
+Backends:
+    "json"   - purani app_data/*.json files (legacy format)
+    "sqlite" - app_data/billbook.db (stdlib sqlite3, indexed tables)
+
+Dono backends mein purane mahino ke bills app_data/archive/ ke compressed
+monthly shards mein ja sakte hain (archive_bills, see bill_archive.py);
+bill reads (count, paging, get_bill, iteration) archive + hot store dono
+ko ek hi history ki tarah dikhate hain.
+
+"json" backend ke baaki datasets (products, settings, rollups, ...) write-behind
+hain: save() sirf dataset ko dirty mark karta hai, flush() (app mein debounced
+Clock + on_pause / on_stop) saari pending files ek saath likhta hai. on_dirty
+hook set na ho (headless tools) to save() foran flush karta hai.
+"""
+# --------------------------
+# Imports
+# --------------------------
+import os
+import copy
+import json
+import sqlite3
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import instrument
+from instrument import timed, count_bytes
+from journal import BillJournal
+from bill_archive import BillArchive, month_of
+from customers import FIELDS as CUSTOMER_FIELDS, as_record
+
+
+# --------------------------
+# Config
+# --------------------------
+DATASET_FILES = {
+    "customers": "customers.json",
+    "products": "products.json",
+    "bills": "bills.json",
+    "settings": "settings.json",
+}
+
+# app ke apne (insaan ke edit ke liye nahi) datasets: bina indent, kam bytes
+COMPACT_DATASETS = ("rollups",)
+
+SQLITE_FILE = "billbook.db"
+ARCHIVE_DIR = "archive"
+SCHEMA_VERSION = 5
+
+_active = None
+
+
+# --------------------------
+# Raw JSON helpers
+# --------------------------
+def read_json(file_path, default):
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            if instrument.is_enabled():
+                count_bytes("json.read", read=os.fstat(f.fileno()).st_size)
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(file_path, data, indent=4):
+    """Write JSON atomically (temp file + fsync + rename): a crash never leaves half a file."""
+    tmp = file_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent)
+        if instrument.is_enabled():
+            count_bytes("json.write", written=f.tell())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, file_path)
+
+
+def name_key(name):
+    """Normalized product name used for lookups"""
+    return str(name).strip().lower()
+
+
+# --------------------------
+# Repository Interface
+# --------------------------
+class Repository:
+    """Common interface for all storage backends.
+
+    Bills are dicts with id, date, customer_name, customer_phone, items and
+    total. Products are dicts with a stable integer id, name, price and an
+    optional sku (barcode, "" if none).
+    """
+    data_dir = None
+    # write-behind backends call on_dirty() after a buffered save (e.g. a Clock trigger)
+    on_dirty = None
+
+    # whole datasets (load_data / save_data compatibility)
+    def load(self, name, default):
+        raise NotImplementedError
+
+    def save(self, name, data):
+        raise NotImplementedError
+
+    # bills
+    def add_bill(self, bill):
+        raise NotImplementedError
+
+    def get_bill(self, bill_id):
+        raise NotImplementedError
+
+    def bill_count(self):
+        raise NotImplementedError
+
+    def bills_page(self, offset, limit, newest_first=False):
+        raise NotImplementedError
+
+    def iter_bills(self):
+        raise NotImplementedError
+
+    def bills_between(self, start=None, end=None, after_id=None):
+        """Bills with start <= date <= end (ISO "YYYY-MM-DD" strings, None = open),
+        optionally only those with id > after_id (incremental exports)."""
+        raise NotImplementedError
+
+    def clear_bills(self):
+        raise NotImplementedError
+
+    def archive_bills(self, before_month):
+        """Move bills dated before `before_month` ("YYYY-MM") from the hot store
+        into compressed monthly shards. Returns the number of bills moved."""
+        raise NotImplementedError
+
+    def archive_info(self):
+        return {"months": len(self.archive.months()), "bills": self.archive.count(),
+                "bytes": self.archive.size_bytes()}
+
+    def _archive_groups(self, bills):
+        # month -> bills, history order mein
+        groups = {}
+        for b in bills:
+            groups.setdefault(month_of(b), []).append(b)
+        return groups
+
+    # bill numbers (monotonic, never reused, independent of bill history size)
+    def peek_bill_number(self):
+        """Number the next saved bill will most likely get (for display)."""
+        raise NotImplementedError
+
+    def allocate_bill_number(self):
+        """Atomically reserve the next bill number (safe across processes)."""
+        raise NotImplementedError
+
+    # products
+    def list_products(self):
+        raise NotImplementedError
+
+    def find_product(self, name):
+        raise NotImplementedError
+
+    def search_products(self, text, limit=5):
+        raise NotImplementedError
+
+    def add_product(self, name, price, sku=""):
+        raise NotImplementedError
+
+    def add_products(self, products):
+        """Insert several {"name", "price"[, "sku"]} dicts in one write; returns them with ids."""
+        return [self.add_product(p["name"], p["price"], p.get("sku", "")) for p in products]
+
+    def update_product(self, product_id, name, price, sku=None):
+        """Rename / reprice a product (sku=None keeps it); returns the updated product or None."""
+        raise NotImplementedError
+
+    def import_products(self, new_products, updates):
+        """Bulk import: insert new_products and apply full product dicts in
+        `updates` (matched by id) in a single write. Returns the inserted products."""
+        raise NotImplementedError
+
+    def remove_product(self, product_id):
+        raise NotImplementedError
+
+    # sales rollups (see rollups.py)
+    def load_rollups(self):
+        """Stored rollup dict, or None if rollups were never built."""
+        raise NotImplementedError
+
+    def update_rollups(self, rollups, deltas):
+        """Persist one bill's deltas; `rollups` is the already-updated SalesRollups."""
+        raise NotImplementedError
+
+    def replace_rollups(self, rollups):
+        raise NotImplementedError
+
+    # customer directory (see customers.py)
+    def load_customers(self):
+        """Stored customer records (list), or None if the directory was never built."""
+        raise NotImplementedError
+
+    def update_customer(self, directory, record):
+        """Persist one customer's updated record; `directory` is the live CustomerDirectory."""
+        raise NotImplementedError
+
+    def replace_customers(self, directory):
+        raise NotImplementedError
+
+    # settings
+    def get_settings(self, default):
+        return self.load("settings", default)
+
+    def save_settings(self, settings):
+        self.save("settings", settings)
+
+    def change_token(self, name):
+        """Value that changes when a dataset is modified outside this object."""
+        return None
+
+    # maintenance
+    def compact(self):
+        """Fold write-ahead data into the main store (shutdown / schedule)."""
+        return False
+
+    def compact_async(self):
+        return None
+
+    def flush(self):
+        """Write buffered (write-behind) changes now; True if anything was written."""
+        return False
+
+    def preload(self):
+        """Warm lazily loaded data (call from a worker thread at startup)."""
+        pass
+
+    def close(self):
+        pass
+
+
+# --------------------------
+# Bill Sequence (json backend)
+# --------------------------
+class FileLock:
+    """Exclusive lock on a small .lock file, shared between threads and processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._f = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._f = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+        else:
+            self._f.seek(0)
+            msvcrt.locking(self._f.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+            else:
+                self._f.seek(0)
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._f.close()
+            self._f = None
+            self._thread_lock.release()
+
+
+class BillSequence:
+    """Last issued bill number in its own tiny record: {"last": N}.
+
+    seed() sirf pehli dafa chalta hai (purani history ka sab se bara bill id).
+    """
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self.lock = FileLock(path + ".lock")
+
+    def _read(self):
+        record = read_json(self.path, None)
+        if record is None:
+            return int(self.seed())
+        return int(record["last"])
+
+    def peek(self):
+        with self.lock:
+            return self._read() + 1
+
+    def allocate(self):
+        with self.lock:
+            number = self._read() + 1
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"last": number}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            return number
+
+
+# --------------------------
+# JSON Backend (legacy files)
+# --------------------------
+class JsonRepository(Repository):
+    """Keeps the original app_data/*.json layout.
+
+    Bills go through an append-only journal (see journal.py), so saving a
+    bill appends one line instead of rewriting bills.json.
+    """
+
+    def __init__(self, data_dir, journal_fsync=False):
+        self.data_dir = data_dir
+        self._lock = threading.RLock()
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        # bills.json pehli zaroorat par (ya preload() se background mein) parhi jati hai
+        self.journal = BillJournal(self.path("bills"), fsync=journal_fsync, lazy=True)
+        self.archive = BillArchive(os.path.join(data_dir, ARCHIVE_DIR))
+        self._dirty = {}    # name -> (data, change token from before the first pending save)
+        self._flushed = {}  # name -> (file mtime after our flush, token reported for it)
+        self.sequence = BillSequence(self.path("bill_seq"), self._max_bill_id)
+
+    def path(self, name):
+        return os.path.join(self.data_dir, DATASET_FILES.get(name, f"{name}.json"))
+
+    def _read(self, name, default):
+        # pending write ho to wahi (copy), warna disk
+        with self._lock:
+            if name in self._dirty:
+                return copy.deepcopy(self._dirty[name][0])
+        return read_json(self.path(name), default)
+
+    def load(self, name, default):
+        if name == "bills":
+            return list(self.iter_bills())
+        if name == "products":
+            return self.list_products()
+        return self._read(name, default)
+
+    def save(self, name, data):
+        if name == "bills":
+            self.archive.clear()
+            self.journal.replace_all(data)
+            return
+        with self._lock:
+            token = self._dirty[name][1] if name in self._dirty else self._disk_token(name)
+            self._dirty[name] = (data, token)
+        if self.on_dirty is None:
+            self.flush()
+        else:
+            self.on_dirty()
+
+    def flush(self):
+        with self._lock:
+            pending, self._dirty = self._dirty, {}
+            names = list(pending)
+            try:
+                while names:
+                    name = names[0]
+                    data, token = pending[name]
+                    write_json(self.path(name), data,
+                               indent=None if name in COMPACT_DATASETS else 4)
+                    self._flushed[name] = (self._mtime(name), token)
+                    names.pop(0)
+            except BaseException:
+                # jo nahi likhe gaye woh agli flush ke liye pending rahein
+                for name in names:
+                    self._dirty.setdefault(name, pending[name])
+                raise
+            return bool(pending)
+
+    def _mtime(self, name):
+        try:
+            return os.stat(self.path(name)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _disk_token(self, name):
+        # apni flush se bani mtime par wohi token jo write se pehle tha, taake
+        # DataService apne hi write ko "bahar ki change" na samjhe
+        mtime = self._mtime(name)
+        flushed = self._flushed.get(name)
+        if flushed is not None and flushed[0] == mtime:
+            return flushed[1]
+        return mtime
+
+    def preload(self):
+        self.journal.bills
+
+    def change_token(self, name):
+        if name == "bills":
+            return self.journal.version
+        with self._lock:
+            if name in self._dirty:
+                return self._dirty[name][1]
+            return self._disk_token(name)
+
+    # bills
+    def add_bill(self, bill):
+        self.journal.append(bill)
+
+    def get_bill(self, bill_id):
+        with self.journal.lock:
+            for b in reversed(self.journal.bills):
+                if b.get("id") == bill_id:
+                    return b
+        return self.archive.get_bill(bill_id)
+
+    def bill_count(self):
+        # archive_bills() manifest aur hot store isi lock mein ek saath badalta hai
+        with self.journal.lock:
+            return len(self.journal.bills) + self.archive.count()
+
+    def _hot_page(self, offset, limit, newest_first):
+        with self.journal.lock:
+            bills = self.journal.bills
+            if newest_first:
+                end = max(len(bills) - offset, 0)
+                return bills[max(end - limit, 0):end][::-1]
+            return bills[offset:offset + limit]
+
+    def bills_page(self, offset, limit, newest_first=False):
+        return self.archive.merge_page(offset, limit, newest_first,
+                                       len(self.journal.bills), self._hot_page)
+
+    def _hot_bills(self):
+        with self.journal.lock:
+            return list(self.journal.bills)
+
+    def iter_bills(self):
+        yield from self.archive.iter_bills()
+        yield from self._hot_bills()
+
+    def bills_between(self, start=None, end=None, after_id=None):
+        yield from self.archive.bills_between(start, end, after_id)
+        for b in self._hot_bills():
+            date = b.get("date", "")
+            if (start is None or date >= start) and (end is None or date <= end) \
+                    and (after_id is None or int(b.get("id", 0) or 0) > after_id):
+                yield b
+
+    def clear_bills(self):
+        self.archive.clear()
+        self.journal.replace_all([])
+
+    def archive_bills(self, before_month):
+        with self.journal.lock:
+            # sqlite jaisa: "2024-03-15" < "2024-04"
+            old = [b for b in self.journal.bills if str(b.get("date", "")) < before_month]
+        if not old:
+            return 0
+        # compress lock ke bahar; naye bills (aaj ki date) is dauran append hote rahen
+        staged = [self.archive.write_month(month, bills)
+                  for month, bills in self._archive_groups(old).items()]
+        moved = {id(b) for b in old}
+        with self.journal.lock:
+            self.archive.publish(staged)
+            self.journal.replace_all([b for b in self.journal.bills if id(b) not in moved])
+        return len(old)
+
+    def _max_bill_id(self):
+        with self.journal.lock:
+            hot = [int(b.get("id", 0) or 0) for b in self.journal.bills]
+        return max(hot + [self.archive.max_id()])
+
+    def peek_bill_number(self):
+        return self.sequence.peek()
+
+    def allocate_bill_number(self):
+        return self.sequence.allocate()
+
+    def load_rollups(self):
+        return self._read("rollups", None)
+
+    def update_rollups(self, rollups, deltas):
+        self.replace_rollups(rollups)
+
+    def replace_rollups(self, rollups):
+        # live dict: flush ke waqt jo bhi taaza totals hon wohi likhe jate hain
+        self.save("rollups", rollups.to_dict())
+
+    def load_customers(self):
+        customers = self._read("customers", None)
+        return customers if isinstance(customers, list) else None
+
+    def update_customer(self, directory, record):
+        self.replace_customers(directory)
+
+    def replace_customers(self, directory):
+        # rollups ki tarah live list; write-behind flush taaza records likhta hai
+        self.save("customers", directory.to_list())
+
+    def compact(self):
+        return self.journal.compact()
+
+    def compact_async(self):
+        return self.journal.compact_async()
+
+    def close(self):
+        self.flush()
+        self.journal.compact()
+
+    # products
+    def list_products(self):
+        with self._lock:
+            products = self._read("products", [])
+            # purani files mein id nahi hoti, pehli dafa load par de dein
+            next_id = max([p.get("id", 0) for p in products] + [0]) + 1
+            missing = False
+            for p in products:
+                if "id" not in p:
+                    p["id"] = next_id
+                    next_id += 1
+                    missing = True
+            if missing:
+                self.save("products", products)
+            return products
+
+    def find_product(self, name):
+        key = name_key(name)
+        for p in self.list_products():
+            if name_key(p["name"]) == key:
+                return p
+        return None
+
+    def search_products(self, text, limit=5):
+        key = name_key(text)
+        matches = [p for p in self.list_products() if key in p["name"].lower()]
+        return matches[:limit]
+
+    def add_product(self, name, price, sku=""):
+        with self._lock:
+            products = self.list_products()
+            product = {
+                "id": max([p["id"] for p in products] + [0]) + 1,
+                "name": name,
+                "price": float(price),
+                "sku": str(sku or "").strip(),
+            }
+            products.append(product)
+            self.save("products", products)
+            return product
+
+    def add_products(self, new_products):
+        with self._lock:
+            products = self.list_products()
+            next_id = max([p["id"] for p in products] + [0]) + 1
+            added = [{"id": next_id + i, "name": p["name"], "price": float(p["price"]),
+                      "sku": str(p.get("sku") or "").strip()}
+                     for i, p in enumerate(new_products)]
+            if added:
+                products.extend(added)
+                self.save("products", products)
+            return added
+
+    def import_products(self, new_products, updates):
+        with self._lock:
+            products = self.list_products()
+            changed = {p["id"]: p for p in updates}
+            for idx, p in enumerate(products):
+                if p["id"] in changed:
+                    c = changed[p["id"]]
+                    products[idx] = {"id": p["id"], "name": c["name"], "price": float(c["price"]),
+                                     "sku": str(c.get("sku") or "").strip()}
+            next_id = max([p["id"] for p in products] + [0]) + 1
+            added = [{"id": next_id + i, "name": p["name"], "price": float(p["price"]),
+                      "sku": str(p.get("sku") or "").strip()}
+                     for i, p in enumerate(new_products)]
+            products.extend(added)
+            self.save("products", products)
+            return added
+
+    def update_product(self, product_id, name, price, sku=None):
+        with self._lock:
+            products = self.list_products()
+            for p in products:
+                if p["id"] == product_id:
+                    p["name"] = name
+                    p["price"] = float(price)
+                    if sku is not None:
+                        p["sku"] = str(sku).strip()
+                    self.save("products", products)
+                    return dict(p)
+            return None
+
+    def remove_product(self, product_id):
+        with self._lock:
+            products = self.list_products()
+            for idx, p in enumerate(products):
+                if p["id"] == product_id:
+                    removed = products.pop(idx)
+                    self.save("products", products)
+                    return removed
+            return None
+
+
+# --------------------------
+# SQLite Backend
+# --------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bills (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    customer_name TEXT NOT NULL DEFAULT '',
+    customer_phone TEXT NOT NULL DEFAULT '',
+    total REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_bills_id ON bills(id);
+CREATE INDEX IF NOT EXISTS idx_bills_date ON bills(date);
+CREATE INDEX IF NOT EXISTS idx_bills_phone ON bills(customer_phone);
+
+CREATE TABLE IF NOT EXISTS bill_items (
+    bill_seq INTEGER NOT NULL REFERENCES bills(seq) ON DELETE CASCADE,
+    line INTEGER NOT NULL,
+    product TEXT NOT NULL,
+    qty INTEGER NOT NULL,
+    price REAL NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (bill_seq, line)
+);
+CREATE INDEX IF NOT EXISTS idx_bill_items_product ON bill_items(product);
+
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    price REAL NOT NULL,
+    sku TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_products_name_key ON products(name_key);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS records (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    revenue REAL NOT NULL DEFAULT 0,
+    bills INTEGER NOT NULL DEFAULT 0,
+    items INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, key)
+);
+
+CREATE TABLE IF NOT EXISTS customers (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    phone TEXT NOT NULL DEFAULT '',
+    spend REAL NOT NULL DEFAULT 0,
+    bills INTEGER NOT NULL DEFAULT 0,
+    first_visit TEXT NOT NULL DEFAULT '',
+    last_visit TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+CUSTOMER_INSERT = (f"INSERT OR REPLACE INTO customers ({', '.join(CUSTOMER_FIELDS)}) "
+                   f"VALUES ({', '.join(':' + f for f in CUSTOMER_FIELDS)})")
+
+
+class SqliteRepository(Repository):
+    """Indexed tables for bills, bill items, products and settings.
+
+    Single-row inserts / deletes only touch the affected rows and their
+    indexes, so saving a bill does not depend on the history size.
+    """
+
+    def __init__(self, data_dir, filename=SQLITE_FILE):
+        self.data_dir = data_dir
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        self.db_path = os.path.join(data_dir, filename)
+        self._lock = threading.RLock()
+        # screens ke ilawa worker threads bhi read karte hain, lock hum khud lete hain
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.archive = BillArchive(os.path.join(data_dir, ARCHIVE_DIR))
+        self._migrate()
+
+    def _migrate(self):
+        with self._lock:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+            with self.conn:
+                self.conn.executescript(SCHEMA)
+                self._add_missing_columns()
+            if version == 0:
+                self._import_legacy_json()
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _add_missing_columns(self):
+        # v4: products.sku (CREATE TABLE IF NOT EXISTS purani table ko nahi badalta)
+        cols = {r["name"] for r in self.conn.execute("PRAGMA table_info(products)")}
+        if "sku" not in cols:
+            self.conn.execute("ALTER TABLE products ADD COLUMN sku TEXT NOT NULL DEFAULT ''")
+
+    def _import_legacy_json(self):
+        """First run: copy the old JSON files into the database (one transaction)."""
+        legacy = JsonRepository(self.data_dir)
+        # archive/ dono backends ka saanjha hai, sirf hot bills copy karein
+        bills = legacy.journal.bills
+        products = read_json(legacy.path("products"), [])
+        settings = read_json(legacy.path("settings"), None)
+        customers = read_json(legacy.path("customers"), None)
+        with self.conn:
+            for b in bills:
+                self._insert_bill(b)
+            self._insert_products(products)
+            if settings is not None:
+                self._replace_settings(settings)
+            if isinstance(customers, list):
+                self._replace_customers(customers)
+
+    # --- low level helpers (caller holds lock + transaction) ---
+    def _insert_bill(self, bill):
+        cur = self.conn.execute(
+            "INSERT INTO bills (id, date, customer_name, customer_phone, total) VALUES (?, ?, ?, ?, ?)",
+            (bill.get("id", 0), bill.get("date", ""), bill.get("customer_name", ""),
+             bill.get("customer_phone", ""), bill.get("total", 0)))
+        seq = cur.lastrowid
+        self.conn.executemany(
+            "INSERT INTO bill_items (bill_seq, line, product, qty, price, total) VALUES (?, ?, ?, ?, ?, ?)",
+            [(seq, line, str(it.get("product", "")), it.get("qty", 0), it.get("price", 0), it.get("total", 0))
+             for line, it in enumerate(bill.get("items", []))])
+        return seq
+
+    def _insert_products(self, products):
+        for p in products:
+            self.conn.execute(
+                "INSERT INTO products (id, name, name_key, price, sku) VALUES (?, ?, ?, ?, ?)",
+                (p.get("id"), p["name"], name_key(p["name"]), float(p["price"]),
+                 str(p.get("sku") or "").strip()))
+
+    def _replace_settings(self, settings):
+        self.conn.execute("DELETE FROM settings")
+        self.conn.executemany(
+            "INSERT INTO settings (key, value) VALUES (?, ?)",
+            [(k, json.dumps(v)) for k, v in settings.items()])
+
+    def _replace_customers(self, records):
+        self.conn.execute("DELETE FROM customers")
+        self.conn.executemany(
+            CUSTOMER_INSERT, [r for r in map(as_record, records) if r is not None])
+
+    def _put_record(self, name, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO records (name, value) VALUES (?, ?)",
+            (name, json.dumps(value)))
+
+    def _bills_from_rows(self, rows):
+        if not rows:
+            return []
+        seqs = [r["seq"] for r in rows]
+        items = {seq: [] for seq in seqs}
+        marks = ",".join("?" * len(seqs))
+        for it in self.conn.execute(
+                f"SELECT bill_seq, product, qty, price, total FROM bill_items "
+                f"WHERE bill_seq IN ({marks}) ORDER BY bill_seq, line", seqs):
+            items[it["bill_seq"]].append({
+                "product": it["product"], "qty": it["qty"],
+                "price": it["price"], "total": it["total"],
+            })
+        return [{
+            "id": r["id"],
+            "date": r["date"],
+            "customer_name": r["customer_name"],
+            "customer_phone": r["customer_phone"],
+            "items": items[r["seq"]],
+            "total": r["total"],
+        } for r in rows]
+
+    # --- datasets ---
+    def load(self, name, default):
+        if name == "bills":
+            return list(self.iter_bills())
+        if name == "products":
+            return self.list_products()
+        if name == "customers":
+            customers = self.load_customers()
+            return customers if customers is not None else default
+        if name == "settings":
+            with self._lock:
+                rows = self.conn.execute("SELECT key, value FROM settings").fetchall()
+            if not rows:
+                return default
+            return {r["key"]: json.loads(r["value"]) for r in rows}
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM records WHERE name = ?", (name,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def save(self, name, data):
+        with self._lock, self.conn:
+            if name == "bills":
+                self.archive.clear()
+                self.conn.execute("DELETE FROM bills")
+                for b in data:
+                    self._insert_bill(b)
+            elif name == "products":
+                self.conn.execute("DELETE FROM products")
+                self._insert_products(data)
+            elif name == "settings":
+                self._replace_settings(data)
+            elif name == "customers":
+                self._replace_customers(data)
+            else:
+                self._put_record(name, data)
+
+    # --- bills ---
+    def add_bill(self, bill):
+        with self._lock, self.conn:
+            self._insert_bill(bill)
+
+    def get_bill(self, bill_id):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM bills WHERE id = ? ORDER BY seq DESC LIMIT 1", (bill_id,)).fetchall()
+            bills = self._bills_from_rows(rows)
+        return bills[0] if bills else self.archive.get_bill(bill_id)
+
+    def _hot_count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM bills").fetchone()[0]
+
+    def bill_count(self):
+        with self._lock:
+            return self._hot_count() + self.archive.count()
+
+    def _hot_page(self, offset, limit, newest_first):
+        order = "DESC" if newest_first else "ASC"
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM bills ORDER BY seq {order} LIMIT ? OFFSET ?",
+                (limit, offset)).fetchall()
+            return self._bills_from_rows(rows)
+
+    def bills_page(self, offset, limit, newest_first=False):
+        if not self.archive.count():
+            return self._hot_page(offset, limit, newest_first)
+        return self.archive.merge_page(offset, limit, newest_first, self._hot_count(), self._hot_page)
+
+    def iter_bills(self, batch=500):
+        yield from self.archive.iter_bills()
+        last = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT * FROM bills WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (last, batch)).fetchall()
+                bills = self._bills_from_rows(rows)
+            if not rows:
+                return
+            last = rows[-1]["seq"]
+            yield from bills
+
+    def bills_between(self, start=None, end=None, after_id=None, batch=500):
+        yield from self.archive.bills_between(start, end, after_id)
+        last = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT * FROM bills WHERE seq > ? AND date >= ? AND date <= ? AND id > ? "
+                    "ORDER BY seq LIMIT ?",
+                    (last, start or "", end or "\uffff", -1 if after_id is None else after_id,
+                     batch)).fetchall()
+                bills = self._bills_from_rows(rows)
+            if not rows:
+                return
+            last = rows[-1]["seq"]
+            yield from bills
+
+    def clear_bills(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM bills")
+        self.archive.clear()
+
+    def archive_bills(self, before_month, batch=500):
+        # "2024-03-15" < "2024-04", is liye date < before_month = pichle mahine
+        with self._lock:
+            prefixes = [r[0] for r in self.conn.execute(
+                "SELECT DISTINCT substr(date, 1, 7) FROM bills WHERE date < ?", (before_month,))]
+        moved = 0
+        for prefix in prefixes:
+            # ek mahina ek waqt mein: memory sirf ek shard jitni
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT * FROM bills WHERE date < ? AND substr(date, 1, 7) = ? ORDER BY seq",
+                    (before_month, prefix)).fetchall()
+                bills = []
+                for i in range(0, len(rows), batch):
+                    bills.extend(self._bills_from_rows(rows[i:i + batch]))
+            if not bills:
+                continue
+            staged = [self.archive.write_month(month, group)
+                      for month, group in self._archive_groups(bills).items()]
+            seqs = [r["seq"] for r in rows]
+            with self._lock, self.conn:
+                # manifest aur DELETE ek lock mein: bill_count() bill ko do dafa na gine
+                self.archive.publish(staged)
+                for i in range(0, len(seqs), batch):
+                    chunk = seqs[i:i + batch]
+                    self.conn.execute(
+                        f"DELETE FROM bills WHERE seq IN ({','.join('?' * len(chunk))})", chunk)
+            moved += len(rows)
+        return moved
+
+    def _ensure_bill_sequence(self):
+        # pehli dafa: purani history (archive samait) ke sab se bare bill id se shuru karein
+        archived = self.archive.max_id()
+        self.conn.execute(
+            "INSERT OR IGNORE INTO sequences (name, value) "
+            "SELECT 'bill', MAX(COALESCE(MAX(id), 0), ?) FROM bills", (archived,))
+
+    def peek_bill_number(self):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM sequences WHERE name = 'bill'").fetchone()
+            if row is None:
+                with self.conn:
+                    self._ensure_bill_sequence()
+                row = self.conn.execute("SELECT value FROM sequences WHERE name = 'bill'").fetchone()
+            return row[0] + 1
+
+    def allocate_bill_number(self):
+        # UPDATE write lock le leta hai, is liye doosra process beech mein wahi number nahi le sakta
+        with self._lock, self.conn:
+            self._ensure_bill_sequence()
+            self.conn.execute("UPDATE sequences SET value = value + 1 WHERE name = 'bill'")
+            return self.conn.execute("SELECT value FROM sequences WHERE name = 'bill'").fetchone()[0]
+
+    def load_rollups(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT kind, key, revenue, bills, items FROM rollups").fetchall()
+            if not rows and self.bill_count():
+                return None
+        data = {}
+        for r in rows:
+            data.setdefault(r["kind"], {})[r["key"]] = [r["revenue"], r["bills"], r["items"]]
+        return data
+
+    def update_rollups(self, rollups, deltas):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO rollups (kind, key, revenue, bills, items) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(kind, key) DO UPDATE SET revenue = revenue + excluded.revenue, "
+                "bills = bills + excluded.bills, items = items + excluded.items", deltas)
+
+    def replace_rollups(self, rollups):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM rollups")
+            self.conn.executemany(
+                "INSERT INTO rollups (kind, key, revenue, bills, items) VALUES (?, ?, ?, ?, ?)",
+                [(kind, key, v[0], v[1], v[2])
+                 for kind, buckets in rollups.to_dict().items() for key, v in buckets.items()])
+
+    def load_customers(self):
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(CUSTOMER_FIELDS)} FROM customers").fetchall()
+            if not rows and self.bill_count():
+                return None
+        return [dict(r) for r in rows]
+
+    def update_customer(self, directory, record):
+        # sirf is customer ki row; directory ke size par depend nahi karta
+        with self._lock, self.conn:
+            self.conn.execute(CUSTOMER_INSERT, record)
+
+    def replace_customers(self, directory):
+        with self._lock, self.conn:
+            self._replace_customers(directory.to_list())
+
+    def compact(self):
+        # WAL file ko main database mein fold karein
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return True
+
+    def compact_async(self):
+        t = threading.Thread(target=self.compact, name="sqlite-checkpoint", daemon=True)
+        t.start()
+        return t
+
+    # --- products ---
+    def _product_from_row(self, row):
+        return {"id": row["id"], "name": row["name"], "price": row["price"], "sku": row["sku"]}
+
+    def list_products(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT id, name, price, sku FROM products ORDER BY id").fetchall()
+        return [self._product_from_row(r) for r in rows]
+
+    def find_product(self, name):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, name, price, sku FROM products WHERE name_key = ? ORDER BY id LIMIT 1",
+                (name_key(name),)).fetchone()
+        return self._product_from_row(row) if row else None
+
+    def search_products(self, text, limit=5):
+        pattern = "%" + name_key(text).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, name, price, sku FROM products WHERE name_key LIKE ? ESCAPE '\\' "
+                "ORDER BY id LIMIT ?", (pattern, limit)).fetchall()
+        return [self._product_from_row(r) for r in rows]
+
+    def add_product(self, name, price, sku=""):
+        return self.add_products([{"name": name, "price": price, "sku": sku}])[0]
+
+    def add_products(self, products):
+        added = []
+        with self._lock, self.conn:
+            for p in products:
+                sku = str(p.get("sku") or "").strip()
+                cur = self.conn.execute(
+                    "INSERT INTO products (name, name_key, price, sku) VALUES (?, ?, ?, ?)",
+                    (p["name"], name_key(p["name"]), float(p["price"]), sku))
+                added.append({"id": cur.lastrowid, "name": p["name"], "price": float(p["price"]), "sku": sku})
+        return added
+
+    def import_products(self, new_products, updates):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE products SET name = ?, name_key = ?, price = ?, sku = ? WHERE id = ?",
+                [(p["name"], name_key(p["name"]), float(p["price"]), str(p.get("sku") or "").strip(), p["id"])
+                 for p in updates])
+            added = []
+            for p in new_products:
+                sku = str(p.get("sku") or "").strip()
+                cur = self.conn.execute(
+                    "INSERT INTO products (name, name_key, price, sku) VALUES (?, ?, ?, ?)",
+                    (p["name"], name_key(p["name"]), float(p["price"]), sku))
+                added.append({"id": cur.lastrowid, "name": p["name"], "price": float(p["price"]), "sku": sku})
+        return added
+
+    def update_product(self, product_id, name, price, sku=None):
+        with self._lock, self.conn:
+            if sku is not None:
+                self.conn.execute("UPDATE products SET sku = ? WHERE id = ?", (str(sku).strip(), product_id))
+            cur = self.conn.execute(
+                "UPDATE products SET name = ?, name_key = ?, price = ? WHERE id = ?",
+                (name, name_key(name), float(price), product_id))
+            if not cur.rowcount:
+                return None
+            row = self.conn.execute(
+                "SELECT id, name, price, sku FROM products WHERE id = ?", (product_id,)).fetchone()
+        return self._product_from_row(row)
+
+    def remove_product(self, product_id):
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT id, name, price, sku FROM products WHERE id = ?", (product_id,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+        return self._product_from_row(row)
+
+    def change_token(self, name):
+        # data_version sirf doosre connections ke commits par badalta hai
+        with self._lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# --------------------------
+# Active repository
+# --------------------------
+BACKENDS = {
+    "json": JsonRepository,
+    "sqlite": SqliteRepository,
+}
+
+
+def open_repository(data_dir, backend="sqlite", **options):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return BACKENDS[backend](data_dir, **options)
+
+
+def init_repository(data_dir, backend="sqlite", **options):
+    """Open the app-wide repository used by load_data / save_data."""
+    global _active
+    if _active is not None:
+        _active.close()
+    _active = open_repository(data_dir, backend, **options)
+    return _active
+
+
+def get_repository():
+    if _active is None:
+        raise RuntimeError("Storage not initialised, call init_repository() first")
+    return _active
+
+
+def _dataset_for_path(file_path):
+    """Map app_data/<name>.json to a dataset name of the active repository."""
+    if _active is None:
+        return None
+    folder, base = os.path.split(os.path.abspath(file_path))
+    if folder != os.path.abspath(_active.data_dir):
+        return None
+    for name, fname in DATASET_FILES.items():
+        if fname == base:
+            return name
+    return None
+
+
+# --------------------------
+# load_data / save_data
+# --------------------------
+@timed("load_data")
+def load_data(file_path, default):
+    name = _dataset_for_path(file_path)
+    if name is None:
+        return read_json(file_path, default)
+    return _active.load(name, default)
+
+
+@timed("save_data")
+def save_data(file_path, data):
+    name = _dataset_for_path(file_path)
+    if name is None:
+        write_json(file_path, data)
+    else:
+        _active.save(name, data)